@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Any, Hashable
+import functools
+from typing import TYPE_CHECKING, Any, Hashable
 
 import dash_bootstrap_components as dbc
-import pandas as pd
 from dash import Dash, Input, Output, callback, dash_table, dcc, html
-from matplotlib import figure
 
 from cohort_creator._plotting import (
     datatypes_histogram,
@@ -19,17 +18,24 @@ from cohort_creator._version import version
 from cohort_creator.data.utils import (
     KNOWN_DATATYPES,
     filter_data,
-    known_datasets_df,
     save_dataset_listing,
-    wrangle_data,
+    wrangled_known_datasets_df,
 )
 
-df = wrangle_data(known_datasets_df())
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objs as go
 
-SOURCES = sorted(df["source"].unique().tolist())
+df = wrangled_known_datasets_df()
+
+SOURCES: tuple[str, ...] = tuple(sorted(df["source"].unique().tolist()))
 
 app = Dash(__name__)
 
+# WSGI entrypoint to serve the dashboard with a production server, for example:
+#   gunicorn --preload --workers 4 cohort_creator._browse:server
+server = app.server
+
 app.layout = html.Div(
     [
         html.H1(children="Cohort creator: BIDS datasets dashboard", style={"textAlign": "center"}),
@@ -70,8 +76,8 @@ app.layout = html.Div(
                 html.Div(
                     [
                         dcc.Checklist(
-                            options=SOURCES,
-                            value=SOURCES,
+                            options=list(SOURCES),
+                            value=list(SOURCES),
                             id="sources",
                         ),
                         dcc.RadioItems(
@@ -201,6 +207,10 @@ app.layout = html.Div(
 
 @callback(
     Output(component_id="table", component_property="data"),
+    Output(component_id="datatype-histogram", component_property="figure"),
+    Output(component_id="subject-vs-figure", component_property="figure"),
+    Output(component_id="task-histogram", component_property="figure"),
+    Output(component_id="time-vs", component_property="figure"),
     Input(component_id="datatypes", component_property="value"),
     Input(component_id="datatypes-and-or", component_property="value"),
     Input(component_id="sources", component_property="value"),
@@ -210,34 +220,41 @@ app.layout = html.Div(
     Input(component_id="mriqc", component_property="value"),
     Input(component_id="physio", component_property="value"),
     Input(component_id="participants", component_property="value"),
+    Input(component_id="subject-vs", component_property="value"),
 )
-def update_table(
+def update_dashboard(
     datatypes: list[str] = KNOWN_DATATYPES,
     datatypes_and_or: str = "OR",
-    sources: list[str] = SOURCES,
+    sources: list[str] | tuple[str, ...] = SOURCES,
     sources_and_or: str = "OR",
     task: str = "",
     fmriprep: None | str = None,
     mriqc: None | str = None,
     physio: None | str = None,
     participants: None | str = None,
-) -> list[dict[Hashable, Any]]:
-    filtered_df = filter_data(
-        df,
-        config={
-            "datatypes": datatypes,
-            "datatypes_and_or": datatypes_and_or,
-            "sources": sources,
-            "sources_and_or": sources_and_or,
-            "task": task,
-            "fmriprep": fmriprep,
-            "mriqc": mriqc,
-            "physio": physio,
-            "participants": participants,
-        },
+    subject_vs: str = "number of tasks",
+) -> tuple[list[dict[Hashable, Any]], go.Figure, go.Figure, go.Figure, go.Figure]:
+    """Update the table and all the figures in a single round-trip."""
+    config = _hashable_config(
+        datatypes=datatypes,
+        datatypes_and_or=datatypes_and_or,
+        sources=sources,
+        sources_and_or=sources_and_or,
+        task=task,
+        fmriprep=fmriprep,
+        mriqc=mriqc,
+        physio=physio,
+        participants=participants,
     )
+    filtered_df = _filter_data(config)
     save_dataset_listing(filtered_df)
-    return table_to_show(filtered_df).to_dict("records")
+    return (
+        _table_records(config),
+        _datatypes_histogram(config),
+        _scatter_subject_vs(config, subject_vs),
+        _histogram_tasks(config),
+        _plot_dataset_size_vs_time(config),
+    )
 
 
 # TODO add a way to display a link to the dataset to explore it on github / openneuro
@@ -252,95 +269,47 @@ def table_to_show(dataframe: pd.DataFrame) -> pd.DataFrame:
         "name",
         "nb_subjects",
         "nb_sessions",
-        "datatypes",
-        "tasks",
+        "datatypes_str",
+        "tasks_str",
     ]
-    sub_df = dataframe[cols]
-    # convert list to string
-    sub_df["datatypes"] = sub_df["datatypes"].apply(lambda x: ", ".join(x))
-    sub_df["tasks"] = sub_df["tasks"].apply(lambda x: ", ".join(x))
-    return sub_df
+    return dataframe[cols].rename(columns={"datatypes_str": "datatypes", "tasks_str": "tasks"})
 
 
-@callback(
-    Output(component_id="datatype-histogram", component_property="figure"),
-    Input(component_id="datatypes", component_property="value"),
-    Input(component_id="datatypes-and-or", component_property="value"),
-    Input(component_id="sources", component_property="value"),
-    Input(component_id="sources-and-or", component_property="value"),
-    Input(component_id="task", component_property="value"),
-    Input(component_id="frmiprep", component_property="value"),
-    Input(component_id="mriqc", component_property="value"),
-    Input(component_id="physio", component_property="value"),
-    Input(component_id="participants", component_property="value"),
-)
-def update_datatype_histogram(
-    datatypes: list[str] = KNOWN_DATATYPES,
-    datatypes_and_or: str = "OR",
-    sources: list[str] = SOURCES,
-    sources_and_or: str = "OR",
-    task: str = "",
-    fmriprep: None | str = None,
-    mriqc: None | str = None,
-    physio: None | str = None,
-    participants: None | str = None,
-) -> figure:
-    filtered_df = filter_data(
-        df,
-        config={
-            "datatypes": datatypes,
-            "datatypes_and_or": datatypes_and_or,
-            "sources": sources,
-            "sources_and_or": sources_and_or,
-            "task": task,
-            "fmriprep": fmriprep,
-            "mriqc": mriqc,
-            "physio": physio,
-            "participants": participants,
-        },
-    )
-    return datatypes_histogram(filtered_df)
+Config = tuple[tuple[str, Any], ...]
 
 
-@callback(
-    Output(component_id="subject-vs-figure", component_property="figure"),
-    Input(component_id="datatypes", component_property="value"),
-    Input(component_id="datatypes-and-or", component_property="value"),
-    Input(component_id="sources", component_property="value"),
-    Input(component_id="sources-and-or", component_property="value"),
-    Input(component_id="task", component_property="value"),
-    Input(component_id="frmiprep", component_property="value"),
-    Input(component_id="mriqc", component_property="value"),
-    Input(component_id="physio", component_property="value"),
-    Input(component_id="participants", component_property="value"),
-    Input(component_id="subject-vs", component_property="value"),
-)
-def update_subject_vs(
-    datatypes: list[str] = KNOWN_DATATYPES,
-    datatypes_and_or: str = "OR",
-    sources: list[str] = SOURCES,
-    sources_and_or: str = "OR",
-    task: str = "",
-    fmriprep: None | str = None,
-    mriqc: None | str = None,
-    physio: None | str = None,
-    participants: None | str = None,
-    subject_vs: str = "number of tasks",
-) -> figure:
-    filtered_df = filter_data(
-        df,
-        config={
-            "datatypes": datatypes,
-            "datatypes_and_or": datatypes_and_or,
-            "sources": sources,
-            "sources_and_or": sources_and_or,
-            "task": task,
-            "fmriprep": fmriprep,
-            "mriqc": mriqc,
-            "physio": physio,
-            "participants": participants,
-        },
+def _hashable_config(**config: Any) -> Config:
+    """Turn the values of the dashboard inputs into a key usable to cache figures."""
+    return tuple(
+        (key, tuple(value) if isinstance(value, list) else value) for key, value in config.items()
     )
+
+
+@functools.lru_cache(maxsize=32)
+def _filter_data(config: Config) -> pd.DataFrame:
+    """Filter the known datasets only once for all the callbacks sharing the same inputs.
+
+    The returned dataframe is shared between callers and must not be modified in place.
+    """
+    return filter_data(df, config=dict(config))
+
+
+# the table and the figures only depend on the state of the dashboard inputs,
+# so they are only built once for each combination of inputs
+
+
+@functools.lru_cache(maxsize=64)
+def _table_records(config: Config) -> list[dict[Hashable, Any]]:
+    return table_to_show(_filter_data(config)).to_dict("records")
+
+
+@functools.lru_cache(maxsize=64)
+def _datatypes_histogram(config: Config) -> go.Figure:
+    return datatypes_histogram(_filter_data(config))
+
+
+@functools.lru_cache(maxsize=64)
+def _scatter_subject_vs(config: Config, subject_vs: str) -> go.Figure:
     if subject_vs == "number of tasks":
         y = "nb_tasks"
     elif subject_vs == "mean size per subject":
@@ -348,7 +317,7 @@ def update_subject_vs(
     elif subject_vs == "mean duration per subject":
         y = "total_duration"
     return scatter_subject_vs(
-        filtered_df,
+        _filter_data(config),
         y=y,
         size=None,
         color="source",
@@ -356,88 +325,17 @@ def update_subject_vs(
     )
 
 
-@callback(
-    Output(component_id="task-histogram", component_property="figure"),
-    Input(component_id="datatypes", component_property="value"),
-    Input(component_id="datatypes-and-or", component_property="value"),
-    Input(component_id="sources", component_property="value"),
-    Input(component_id="sources-and-or", component_property="value"),
-    Input(component_id="task", component_property="value"),
-    Input(component_id="frmiprep", component_property="value"),
-    Input(component_id="mriqc", component_property="value"),
-    Input(component_id="physio", component_property="value"),
-    Input(component_id="participants", component_property="value"),
-)
-def update_task_histogram(
-    datatypes: list[str] = KNOWN_DATATYPES,
-    datatypes_and_or: str = "OR",
-    sources: list[str] = SOURCES,
-    sources_and_or: str = "OR",
-    task: str = "",
-    fmriprep: None | str = None,
-    mriqc: None | str = None,
-    physio: None | str = None,
-    participants: None | str = None,
-) -> figure:
-    filtered_df = filter_data(
-        df,
-        config={
-            "datatypes": datatypes,
-            "datatypes_and_or": datatypes_and_or,
-            "sources": sources,
-            "sources_and_or": sources_and_or,
-            "task": task,
-            "fmriprep": fmriprep,
-            "mriqc": mriqc,
-            "physio": physio,
-            "participants": participants,
-        },
-    )
+@functools.lru_cache(maxsize=64)
+def _histogram_tasks(config: Config) -> go.Figure:
+    return histogram_tasks(_filter_data(config))
 
-    return histogram_tasks(filtered_df)
 
-
-@callback(
-    Output(component_id="time-vs", component_property="figure"),
-    Input(component_id="datatypes", component_property="value"),
-    Input(component_id="datatypes-and-or", component_property="value"),
-    Input(component_id="sources", component_property="value"),
-    Input(component_id="sources-and-or", component_property="value"),
-    Input(component_id="task", component_property="value"),
-    Input(component_id="frmiprep", component_property="value"),
-    Input(component_id="mriqc", component_property="value"),
-    Input(component_id="physio", component_property="value"),
-    Input(component_id="participants", component_property="value"),
-)
-def update_time_vs(
-    datatypes: list[str] = KNOWN_DATATYPES,
-    datatypes_and_or: str = "OR",
-    sources: list[str] = SOURCES,
-    sources_and_or: str = "OR",
-    task: str = "",
-    fmriprep: None | str = None,
-    mriqc: None | str = None,
-    physio: None | str = None,
-    participants: None | str = None,
-) -> figure:
-    filtered_df = filter_data(
-        df,
-        config={
-            "datatypes": datatypes,
-            "datatypes_and_or": datatypes_and_or,
-            "sources": sources,
-            "sources_and_or": sources_and_or,
-            "task": task,
-            "fmriprep": fmriprep,
-            "mriqc": mriqc,
-            "physio": physio,
-            "participants": participants,
-        },
-    )
-    return plot_dataset_size_vs_time(filtered_df)
+@functools.lru_cache(maxsize=64)
+def _plot_dataset_size_vs_time(config: Config) -> go.Figure:
+    return plot_dataset_size_vs_time(_filter_data(config))
 
 
-def browse(debug: bool = True) -> None:
+def browse(debug: bool = False) -> None:
     app.run(debug=debug)
 
 
@@ -2,30 +2,26 @@
 
 from __future__ import annotations
 
+import argparse
 import logging
+import os
 import sys
+from argparse import HelpFormatter
 from pathlib import Path
-from typing import Sequence
+from typing import Callable, Sequence
 
-from rich_argparse import RichHelpFormatter
-
-from cohort_creator._parsers import global_parser
+from cohort_creator._parsers import SUBPARSERS, global_parser
 from cohort_creator.logger import cc_logger
 
 cc_log = cc_logger()
 
 
-def set_verbosity(verbosity: int | list[int]) -> None:
-    if isinstance(verbosity, list):
-        verbosity = verbosity[0]
-    if verbosity == 0:
-        cc_log.setLevel("ERROR")
-    elif verbosity == 1:
-        cc_log.setLevel("WARNING")
-    elif verbosity == 2:
-        cc_log.setLevel("INFO")
-    elif verbosity == 3:
-        cc_log.setLevel("DEBUG")
+# log level of the cohort_creator logger for each verbosity level
+VERBOSITY_LEVELS = ("ERROR", "WARNING", "INFO", "DEBUG")
+
+
+def set_verbosity(verbosity: int) -> None:
+    cc_log.setLevel(VERBOSITY_LEVELS[verbosity])
 
     if verbosity < 3:
         logging.getLogger("datalad").setLevel(logging.WARNING)
@@ -34,34 +30,56 @@ def set_verbosity(verbosity: int | list[int]) -> None:
 
 def cli(argv: Sequence[str] = sys.argv) -> None:
     """Entry point."""
-    parser = global_parser(formatter_class=RichHelpFormatter)
+    # fast path: the version does not need any of the subparsers
+    if len(argv) == 2 and argv[1] in ["-v", "--version"]:
+        from cohort_creator._version import __version__
+
+        print(__version__)
+        sys.exit(0)
 
-    args, unknowns = parser.parse_known_args(argv[1:])
-    if unknowns:
-        cc_log.error(f"The following arguments are unknown: {unknowns}")
-        exit(1)
+    formatter_class: type[HelpFormatter] = HelpFormatter
+    # rich formatting is only needed when the help is displayed
+    if any(arg in ["-h", "--help"] for arg in argv[1:]):
+        from rich_argparse import RichHelpFormatter
+
+        formatter_class = RichHelpFormatter
+
+    # the main parser has no option taking a value so a subcommand can only be the first argument,
+    # all subparsers are built otherwise and argparse reports unknown subcommands
+    subcommand = argv[1] if len(argv) > 1 and argv[1] in SUBPARSERS else None
+    # classes are hashable, mypy only fails to match them against the Hashable protocol
+    parser = global_parser(
+        formatter_class=formatter_class, only_subcommand=subcommand  # type: ignore[arg-type]
+    )
+
+    # argparse errors out on unknown arguments
+    args = parser.parse_args(argv[1:])
 
     verbosity = args.verbosity
     set_verbosity(verbosity)
 
-    if args.command in ["browse"]:
-        from cohort_creator._browse import browse
+    COMMANDS[args.command](args)
+    sys.exit(0)
+
 
-        debug = getattr(args, "debug", False)
-        browse(debug=debug)
-        exit(0)
+def _browse(args: argparse.Namespace) -> None:
+    from cohort_creator._browse import browse
 
-    if args.command in ["update"]:
-        from cohort_creator.data._update import update
+    browse(debug=args.debug)
 
-        debug = getattr(args, "debug", True)
-        update(debug=debug)
-        exit(0)
 
+def _update(args: argparse.Namespace) -> None:
+    from cohort_creator.data._update import update
+
+    update(debug=args.debug)
+
+
+def _create_cohort(args: argparse.Namespace) -> None:
+    """Run the install, get and / or copy steps depending on the subcommand."""
     from cohort_creator._run import _get_participant_listing_from_args
     from cohort_creator._utils import load_dataset_listing, validate_dataset_types
 
-    output_dir = Path(args.output_dir[0]).resolve()
+    output_dir = Path(os.path.abspath(args.output_dir))
 
     dataset_types = args.dataset_types
     validate_dataset_types(dataset_types)
@@ -74,33 +92,28 @@ def cli(argv: Sequence[str] = sys.argv) -> None:
         from cohort_creator._run import _execute_install, create_yoda
 
         create_yoda(output_dir)
-        (output_dir / "sourcedata").mkdir(exist_ok=True, parents=True)
-        _execute_install(dataset_listing, args, output_dir)
+        sourcedata_dir = output_dir / "sourcedata"
+        if not sourcedata_dir.is_dir():
+            sourcedata_dir.mkdir(parents=True)
+        _execute_install(dataset_listing, participant_listing, args, output_dir)
     if args.command == "install":
-        exit(0)
+        return None
 
     datatypes = args.datatypes
 
+    # TODO handle case when several spaces or tasks are passed
     space = args.space
-    if isinstance(space, list):
-        # TODO handle case when several spaces are passed
-        space = space[0]
-
     task = args.task
-    if isinstance(task, list):
-        # TODO handle case when several tasks are passed
-        task = task[0]
 
     from cohort_creator._run import _return_bids_filter
 
     bids_filter = _return_bids_filter(args=args)
 
+    jobs = args.jobs
+
     if args.command in ["get", "all"]:
         from cohort_creator.main import get_data
 
-        jobs = args.jobs
-        if isinstance(jobs, list):
-            jobs = jobs[0]
         get_data(
             output_dir=output_dir,
             datasets=dataset_listing,
@@ -111,9 +124,8 @@ def cli(argv: Sequence[str] = sys.argv) -> None:
             task=task,
             jobs=jobs,
             bids_filter=bids_filter,
+            dataset_jobs=args.dataset_jobs,
         )
-    if args.command == "get":
-        exit(0)
 
     if args.command in ["copy", "all"]:
         from cohort_creator.main import construct_cohort
@@ -129,8 +141,18 @@ def cli(argv: Sequence[str] = sys.argv) -> None:
             space=space,
             bids_filter=bids_filter,
             skip_group_mriqc=skip_group_mriqc,
+            jobs=jobs,
         )
-        exit(0)
+
+
+COMMANDS: dict[str, Callable[[argparse.Namespace], None]] = {
+    "browse": _browse,
+    "update": _update,
+    "install": _create_cohort,
+    "get": _create_cohort,
+    "copy": _create_cohort,
+    "all": _create_cohort,
+}
 
 
 # if __name__ == "__main__":
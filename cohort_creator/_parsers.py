@@ -2,22 +2,25 @@
 
 from __future__ import annotations
 
+import functools
 from argparse import ArgumentParser, HelpFormatter
+from typing import Any, Callable
 
 from ._version import __version__
 
 DOC_URL = "https://cohort-creator.readthedocs.io/en/latest/"
 FAQ_URL = f"{DOC_URL}faq.html"
+EPILOG = f"""
+        For a more readable version of this help section,
+        see the `online doc <{DOC_URL}>`_.
+        """
 
 
 def base_parser(formatter_class: type[HelpFormatter] = HelpFormatter) -> ArgumentParser:
     parser = ArgumentParser(
         prog="cohort_creator",
         description="Creates a cohort by grabbing specific subjects from opennneuro datasets.",
-        epilog=f"""
-        For a more readable version of this help section,
-        see the `online doc <{DOC_URL}>`_.
-        """,
+        epilog=EPILOG,
         formatter_class=formatter_class,
     )
     parser.add_argument(
@@ -29,115 +32,188 @@ def base_parser(formatter_class: type[HelpFormatter] = HelpFormatter) -> Argumen
     return parser
 
 
-def add_common_arguments(parser: ArgumentParser) -> ArgumentParser:
-    parser.add_argument(
-        "-d",
-        "--dataset_listing",
-        help="""
+# arguments are defined once as (flags, keyword arguments of add_argument)
+# and shared by the subparsers that need them
+Argument = tuple[tuple[str, ...], dict[str, Any]]
+
+VERBOSITY: Argument = (
+    ("--verbosity",),
+    {
+        "help": """
+        Verbosity level.
+        """,
+        "required": False,
+        "choices": [0, 1, 2, 3],
+        "default": 2,
+        "type": int,
+    },
+)
+
+COMMON_ARGUMENTS: tuple[Argument, ...] = (
+    (
+        ("-d", "--dataset_listing"),
+        {
+            "help": """
         Path to TSV file containing the list of datasets to get
         or a list of datasets to install (``ds000001 ds000002``).
         """,
-        required=True,
-        nargs="+",
-    )
-    parser.add_argument(
-        "-p",
-        "--participant_listing",
-        help="""
+            "required": True,
+            "nargs": "+",
+        },
+    ),
+    (
+        ("-p", "--participant_listing"),
+        {
+            "help": """
         Path to TSV file containing the list of participants to get.
         Optional. If not provided, all participants will be downloaded.
         """,
-        default=None,
-        required=False,
-        nargs=1,
-    )
-    parser.add_argument(
-        "-o",
-        "--output_dir",
-        help="""
+            "default": None,
+            "required": False,
+        },
+    ),
+    (
+        ("-o", "--output_dir"),
+        {
+            "help": """
         Fullpath to the directory where the output files will be stored.
         """,
-        nargs=1,
-    )
-    parser.add_argument(
-        "--dataset_types",
-        help="""
+        },
+    ),
+    (
+        ("--dataset_types",),
+        {
+            "help": """
         Dataset to install and get data from.
         """,
-        choices=[
-            "raw",
-            "mriqc",
-            "fmriprep",
-        ],
-        required=False,
-        default=["raw"],
-        type=str,
-        nargs="+",
-    )
-    parser.add_argument(
-        "--verbosity",
-        help="""
-        Verbosity level.
-        """,
-        required=False,
-        choices=[0, 1, 2, 3],
-        default=2,
-        type=int,
-        nargs=1,
-    )
-    return parser
-
+            "choices": [
+                "raw",
+                "mriqc",
+                "fmriprep",
+            ],
+            "required": False,
+            "default": ["raw"],
+            "type": str,
+            "nargs": "+",
+        },
+    ),
+    VERBOSITY,
+)
 
-def add_specialized_args(parser: ArgumentParser) -> ArgumentParser:
-    """Add arguments for get and copy."""
-    parser.add_argument(
-        "--datatypes",
-        help="""
+SPECIALIZED_ARGUMENTS: tuple[Argument, ...] = (
+    (
+        ("--datatypes",),
+        {
+            "help": """
         Datatype to get.
         """,
-        choices=[
-            "anat",
-            "func",
-            "fmap",
-        ],
-        required=False,
-        default=["anat"],
-        type=str,
-        nargs="+",
-    )
-    parser.add_argument(
-        "--space",
-        help="""
+            "choices": [
+                "anat",
+                "func",
+                "fmap",
+            ],
+            "required": False,
+            "default": ["anat"],
+            "type": str,
+            "nargs": "+",
+        },
+    ),
+    (
+        ("--space",),
+        {
+            "help": """
         Space of the input data. Only applies when `dataset_types` requested includes `fmriprep`.
         """,
-        required=False,
-        default="MNI152NLin2009cAsym",
-        type=str,
-        nargs=1,
-    )
-    parser.add_argument(
-        "--task",
-        help="""
+            "required": False,
+            "default": "MNI152NLin2009cAsym",
+            "type": str,
+        },
+    ),
+    (
+        ("--task",),
+        {
+            "help": """
         Task of the input data. Only applies when `datatypes` has task entity.
         """,
-        required=False,
-        default="*",
-        type=str,
-        nargs=1,
-    )
-    parser.add_argument(
-        "--bids_filter_file",
-        help=f"""
+            "required": False,
+            "default": "*",
+            "type": str,
+        },
+    ),
+    (
+        ("--bids_filter_file",),
+        {
+            "help": f"""
         Path to a JSON file describing custom BIDS input filters.
         For further details, please check out the `FAQ <{FAQ_URL}>`_.
         """,
-        required=False,
-        nargs=1,
-    )
+            "required": False,
+        },
+    ),
+)
+
+DATASET_JOBS: Argument = (
+    ("--dataset_jobs",),
+    {
+        "help": """
+        Number of datasets to get data from in parallel.
+        """,
+        "required": False,
+        "default": 1,
+        "type": int,
+    },
+)
+
+SKIP_GROUP_MRIQC: Argument = (
+    ("--skip_group_mriqc",),
+    {
+        "action": "store_true",
+        "help": "Skips rerunning mriqc on the subset of participants.",
+    },
+)
+
+
+def jobs_argument(help: str) -> Argument:
+    """Return the --jobs argument with a help specific to each subcommand."""
+    return (("--jobs",), {"help": help, "required": False, "default": 6, "type": int})
+
+
+def add_arguments(parser: ArgumentParser, arguments: tuple[Argument, ...]) -> ArgumentParser:
+    for flags, kwargs in arguments:
+        parser.add_argument(*flags, **kwargs)
     return parser
 
 
-def global_parser(formatter_class: type[HelpFormatter] = HelpFormatter) -> ArgumentParser:
+def add_common_arguments(parser: ArgumentParser) -> ArgumentParser:
+    return add_arguments(parser, COMMON_ARGUMENTS)
+
+
+def add_specialized_args(parser: ArgumentParser) -> ArgumentParser:
+    """Add arguments for get and copy."""
+    return add_arguments(parser, SPECIALIZED_ARGUMENTS)
+
+
+@functools.lru_cache(maxsize=None)
+def global_parser(
+    formatter_class: type[HelpFormatter] = HelpFormatter, only_subcommand: str | None = None
+) -> ArgumentParser:
+    """Return the parser of the cohort_creator command line interface.
+
+    Parameters
+    ----------
+    formatter_class : type[HelpFormatter], default=HelpFormatter
+        Class used to format the help of the parser and its subparsers.
+
+    only_subcommand : str | None, default=None
+        If the name of a subcommand is passed,
+        only the subparser of this subcommand is built.
+        All subparsers are built otherwise.
+
+    Notes
+    -----
+    The parser is cached for each set of arguments:
+    it must not be modified by the caller.
+    """
     parser = base_parser(formatter_class=formatter_class)
     subparsers = parser.add_subparsers(
         dest="command",
@@ -145,115 +221,153 @@ def global_parser(formatter_class: type[HelpFormatter] = HelpFormatter) -> Argum
         required=True,
     )
 
+    if only_subcommand in SUBPARSERS:
+        SUBPARSERS[only_subcommand](subparsers, formatter_class)
+        return parser
+
+    for add_subparser in SUBPARSERS.values():
+        add_subparser(subparsers, formatter_class)
+    return parser
+
+
+def _add_browse_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     browse_parser = subparsers.add_parser(
         "browse",
         help="""Launch a dash app in the browser
 to browse, visualize and filter the listing of known datasets.
 It will also create a dataset-results.tsv with the filtered list of datasets.""",
-        formatter_class=parser.formatter_class,
-    )
-    browse_parser.add_argument(
-        "--verbosity",
-        help="""
-        Verbosity level.
-        """,
-        required=False,
-        choices=[0, 1, 2, 3],
-        default=2,
-        type=int,
-        nargs=1,
+        formatter_class=formatter_class,
     )
-    browse_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Runs the Dash app in debug mode.",
+    add_arguments(
+        browse_parser,
+        (
+            VERBOSITY,
+            (("--debug",), {"action": "store_true", "help": "Runs the Dash app in debug mode."}),
+        ),
     )
 
+
+def _add_update_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     update_parser = subparsers.add_parser(
         "update",
         help="Update listing of known BIDS datasets.",
-        formatter_class=parser.formatter_class,
-    )
-    update_parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Only runs the update for a few subset of datasets.",
+        formatter_class=formatter_class,
     )
-    update_parser.add_argument(
-        "--verbosity",
-        help="""
-        Verbosity level.
-        """,
-        required=False,
-        choices=[0, 1, 2, 3],
-        default=2,
-        type=int,
-        nargs=1,
+    add_arguments(
+        update_parser,
+        (
+            (
+                ("--debug",),
+                {
+                    "action": "store_true",
+                    "help": "Only runs the update for a few subset of datasets.",
+                },
+            ),
+            VERBOSITY,
+        ),
     )
 
+
+def _add_install_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     install_parser = subparsers.add_parser(
         "install",
         help="Install several openneuro datasets.",
-        formatter_class=parser.formatter_class,
+        formatter_class=formatter_class,
     )
     install_parser = add_common_arguments(install_parser)
-    install_parser.add_argument(
-        "--generate_participant_listing",
-        action="store_true",
-        help="Generate a participant_listing.tsv in the output_dir.",
+    add_arguments(
+        install_parser,
+        (
+            (
+                ("--generate_participant_listing",),
+                {
+                    "action": "store_true",
+                    "help": "Generate a participant_listing.tsv in the output_dir.",
+                },
+            ),
+            jobs_argument(
+                """
+        Number of jobs: number of datasets to install in parallel.
+        """
+            ),
+        ),
     )
 
+
+def _add_get_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     get_parser = subparsers.add_parser(
         "get",
         help="Get specified data for a cohort of subjects.",
-        formatter_class=parser.formatter_class,
+        formatter_class=formatter_class,
     )
     get_parser = add_common_arguments(get_parser)
     get_parser = add_specialized_args(get_parser)
-    get_parser.add_argument(
-        "--jobs",
-        help="""
+    add_arguments(
+        get_parser,
+        (
+            jobs_argument(
+                """
         Number of jobs: passed to datalad to speed up getting files.
-        """,
-        required=False,
-        default=6,
-        type=int,
-        nargs=1,
+        """
+            ),
+            DATASET_JOBS,
+        ),
     )
 
+
+def _add_copy_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     copy_parser = subparsers.add_parser(
         "copy",
         help="Copy cohort of subjects into separate directory.",
-        formatter_class=parser.formatter_class,
+        formatter_class=formatter_class,
     )
     copy_parser = add_common_arguments(copy_parser)
     copy_parser = add_specialized_args(copy_parser)
-    copy_parser.add_argument(
-        "--skip_group_mriqc",
-        action="store_true",
-        help="Skips rerunning mriqc on the subset of participants.",
+    add_arguments(
+        copy_parser,
+        (
+            jobs_argument(
+                """
+        Number of jobs: number of files to copy in parallel.
+        """
+            ),
+            SKIP_GROUP_MRIQC,
+        ),
     )
 
+
+def _add_all_parser(subparsers: Any, formatter_class: type[HelpFormatter]) -> None:
     all_parser = subparsers.add_parser(
         "all",
         help="Install, get, and copy cohort of subjects.",
-        formatter_class=parser.formatter_class,
+        formatter_class=formatter_class,
     )
     all_parser = add_common_arguments(all_parser)
     all_parser = add_specialized_args(all_parser)
-    all_parser.add_argument(
-        "--jobs",
-        help="""
-        Number of jobs: passed to datalad to speed up getting files.
-        """,
-        required=False,
-        default=6,
-        type=int,
-        nargs=1,
-    )
-    all_parser.add_argument(
-        "--skip_group_mriqc",
-        action="store_true",
-        help="Skips rerunning mriqc on the subset of participants.",
+    # 'all' runs the install step but has no --generate_participant_listing option
+    all_parser.set_defaults(generate_participant_listing=False)
+    add_arguments(
+        all_parser,
+        (
+            jobs_argument(
+                """
+        Number of jobs: number of datasets to install in parallel,
+        passed to datalad to speed up getting files,
+        and number of files to copy in parallel.
+        """
+            ),
+            DATASET_JOBS,
+            SKIP_GROUP_MRIQC,
+        ),
     )
-    return parser
+
+
+# subparsers in the order they are listed in the help
+SUBPARSERS: dict[str, Callable[[Any, type[HelpFormatter]], None]] = {
+    "browse": _add_browse_parser,
+    "update": _add_update_parser,
+    "install": _add_install_parser,
+    "get": _add_get_parser,
+    "copy": _add_copy_parser,
+    "all": _add_all_parser,
+}
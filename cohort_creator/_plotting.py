@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objs as go
-from matplotlib import figure
-from plotly.subplots import make_subplots
+from typing import TYPE_CHECKING
+
+import numpy as np
 
 from cohort_creator.data.utils import KNOWN_DATATYPES
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib import figure
+
 LABELS = {
     "nb_subjects": "number of participants",
     "nb_sessions": "number of sessions",
@@ -21,7 +23,7 @@ LABELS = {
 
 
 def scatter_subject_vs(
-    df: pd.Dataframe,
+    df: pd.DataFrame,
     y: str,
     size: None | str = None,
     color: None | str = "is_openneuro",
@@ -30,6 +32,8 @@ def scatter_subject_vs(
     log_y: bool = True,
     marginal: None | str | bool = "box",
 ) -> figure:
+    import plotly.express as px
+
     return px.scatter(
         df,
         x="nb_subjects",
@@ -46,40 +50,35 @@ def scatter_subject_vs(
     )
 
 
-def histogram_tasks(df: pd.Dataframe) -> figure:
-    tasks = []
-    for x in df.tasks:
-        tasks.extend(x)
+def histogram_tasks(df: pd.DataFrame) -> figure:
+    import plotly.graph_objs as go
 
-    new_df = pd.DataFrame({"tasks": tasks})
+    tasks = df["tasks"].explode().dropna()
 
-    count = new_df.tasks.value_counts()
-    order = [i[0] for i in count.items()]
-    return px.histogram(
-        new_df, x="tasks", category_orders=dict(tasks=order), title="tasks distribution"
-    )
+    order = tasks.value_counts().index.tolist()
+    fig = go.Figure(go.Histogram(x=tasks.to_numpy()))
+    fig.update_layout(title="tasks distribution")
+    fig.update_xaxes(title_text="tasks", categoryorder="array", categoryarray=order)
+    fig.update_yaxes(title_text="count")
+    return fig
 
 
 def plot_dataset_size_vs_time(df: pd.DataFrame) -> figure:
-    df = df.sort_values(by=["created_on"])
+    import plotly.graph_objs as go
+    from plotly.subplots import make_subplots
 
-    y = []
-    for col in ["size", "nb_subjects"]:
-        cumsum = df[col].cumsum()
-        col = f"cumsum_{col}"
-        df[col] = cumsum
-        y.append(col)
+    # only copy the plotted columns and use a stable sort
+    # that is fast on listings already mostly ordered by creation date
+    sorted_df = df[["created_on", "size", "nb_subjects"]].sort_values(
+        by="created_on", kind="mergesort", ignore_index=True
+    )
+    x = sorted_df["created_on"].to_numpy()
 
     fig = make_subplots(specs=[[{"secondary_y": True}]])
-    for col in y:
-        secondary_y = False
-        if col == "cumsum_nb_subjects":
-            secondary_y = True
-
+    for col, secondary_y in [("size", False), ("nb_subjects", True)]:
+        cumsum = sorted_df[col].cumsum().to_numpy()
         fig.add_trace(
-            go.Scatter(
-                name=col.replace("cumsum_", ""), x=df["created_on"], y=df[col], mode="lines"
-            ),
+            go.Scatter(name=col, x=x, y=cumsum, mode="lines"),
             secondary_y=secondary_y,
         )
     fig.update_layout(title="Cumulative BIDS data across time", hovermode="x")
@@ -91,12 +90,16 @@ def plot_dataset_size_vs_time(df: pd.DataFrame) -> figure:
 
 
 def datatypes_histogram(df: pd.DataFrame) -> figure:
-    datatypes_df = df[KNOWN_DATATYPES].sum()
-    fig = px.bar(
-        datatypes_df,
-        labels={"index": "datatype", "value": "count"},
-        hover_name=None,
-        hover_data=None,
-        title="datatypes in datasets",
+    import plotly.graph_objs as go
+
+    # sum each column directly instead of going through a column-selection copy
+    counts = np.fromiter(
+        (df[col].to_numpy().sum() for col in KNOWN_DATATYPES),
+        dtype=np.int64,
+        count=len(KNOWN_DATATYPES),
     )
+    fig = go.Figure(go.Bar(x=KNOWN_DATATYPES, y=counts))
+    fig.update_layout(title="datatypes in datasets")
+    fig.update_xaxes(title_text="datatype")
+    fig.update_yaxes(title_text="count")
     return fig
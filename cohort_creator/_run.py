@@ -1,10 +1,15 @@
+from __future__ import annotations
+
 import argparse
+import os
 from pathlib import Path
-
-from pandas import DataFrame
+from typing import TYPE_CHECKING
 
 from cohort_creator.logger import cc_logger
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 cc_log = cc_logger()
 
 
@@ -13,23 +18,24 @@ def _get_participant_listing_from_args(args: argparse.Namespace) -> DataFrame |
         return None
     from cohort_creator._utils import load_participant_listing
 
-    participant_listing = Path(args.participant_listing[0]).resolve()
+    participant_listing = Path(os.path.abspath(args.participant_listing))
     return load_participant_listing(participant_listing=participant_listing)
 
 
 def _execute_install(
-    dataset_listing: DataFrame, args: argparse.Namespace, output_dir: Path
+    dataset_listing: DataFrame,
+    participant_listing: DataFrame | None,
+    args: argparse.Namespace,
+    output_dir: Path,
 ) -> None:
     from cohort_creator._utils import get_list_datasets_to_install
     from cohort_creator.main import install_datasets
 
-    participant_listing = _get_participant_listing_from_args(args)
-
     datasets_to_install = get_list_datasets_to_install(
         dataset_listing=dataset_listing, participant_listing=participant_listing
     )
 
-    generate_participant_listing = getattr(args, "generate_participant_listing", False)
+    generate_participant_listing = args.generate_participant_listing
 
     if participant_listing is None:
         generate_participant_listing = True
@@ -39,6 +45,7 @@ def _execute_install(
         output_dir=output_dir,
         dataset_types=args.dataset_types,
         generate_participant_listing=generate_participant_listing,
+        jobs=args.jobs,
     )
 
 
@@ -47,15 +54,17 @@ def _return_bids_filter(args: argparse.Namespace) -> dict[str, dict[str, dict[st
         return None
     from cohort_creator._utils import get_bids_filter
 
-    bids_filter_file = Path(args.bids_filter_file[0]).resolve()
+    bids_filter_file = Path(os.path.abspath(args.bids_filter_file))
     return get_bids_filter(bids_filter_file=bids_filter_file) if bids_filter_file.exists() else None
 
 
 def create_yoda(output_dir: Path) -> None:
+    if (output_dir / ".datalad" / "config").is_file():
+        return None
+
     from datalad import api
 
-    if not output_dir.exists():
-        api.create(path=output_dir, cfg_proc="yoda", result_renderer="disabled")
-    if not (output_dir / ".datalad").exists():
-        cc_log.info(f"Creating yoda dataset for output in: {output_dir}")
-        api.create(path=output_dir, cfg_proc="yoda", force=True, result_renderer="disabled")
+    cc_log.info(f"Creating yoda dataset for output in: {output_dir}")
+    api.create(
+        path=output_dir, cfg_proc="yoda", force=output_dir.exists(), result_renderer="disabled"
+    )
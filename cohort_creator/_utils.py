@@ -2,9 +2,17 @@
 
 from __future__ import annotations
 
-import itertools
+import copy
+import fnmatch
+import functools
+import hashlib
+import importlib.util
 import json
+import os
+import re
 import shutil
+from ast import literal_eval
+from concurrent.futures import ThreadPoolExecutor
 from math import isnan
 from pathlib import Path
 from typing import Any
@@ -12,7 +20,7 @@ from typing import Any
 import numpy as np
 import pandas as pd
 from bids import BIDSLayout
-from bids.layout import BIDSFile
+from bids.layout import BIDSFile, BIDSLayoutIndexer
 from datalad import api
 from rich.progress import (
     BarColumn,
@@ -26,58 +34,213 @@ from rich.progress import (
 )
 
 from cohort_creator._version import __version__
-from cohort_creator.data.utils import known_datasets_df
+from cohort_creator.data.utils import _cache_dir, known_datasets_index
 from cohort_creator.logger import cc_logger
 
 # import gender_guesser.detector as gender
 
 cc_log = cc_logger()
 
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+
+def bids_layout(dataset: Path) -> BIDSLayout:
+    """Index a dataset without validating it or indexing the metadata of its files.
+
+    Only the entities of the file names are queried from the layouts
+    so the metadata of the sidecars does not need to be indexed.
+    """
+    return BIDSLayout(
+        dataset,
+        validate=False,
+        indexer=BIDSLayoutIndexer(validate=False, index_metadata=False),
+    )
+
 
 def create_tsv_participant_session_in_datasets(output_dir: Path, dataset_paths: list[Path]) -> Path:
     (output_dir.parent / "code").mkdir(exist_ok=True, parents=True)
-    content: dict[str, list[str]] = {
-        "DatasetID": [],
-        "SubjectID": [],
-        "SessionID": [],
-        "SessionPath": [],
-    }
-
+    rows: list[tuple[str, str, str | None]] = []
     for dataset in dataset_paths:
-        layout = BIDSLayout(dataset)
-
-        subjects = layout.get_subjects()
-        for sub in sorted(subjects):
-            sessions = layout.get_sessions(subject=sub) or ["n/a"]
-            for ses in sorted(sessions):
-                if ses != "n/a":
-                    ses = f"ses-{ses}"
-
-                content["DatasetID"].append(dataset.name)
-                content["SubjectID"].append(f"sub-{sub}")
-                content["SessionID"].append(ses)
-                if ses != "n/a":
-                    ses += "/"
-                else:
-                    ses = ""
-                content["SessionPath"].append(f"{dataset.name}/sub-{sub}/{ses}")
-
-    df = pd.DataFrame(content)
+        layout = bids_layout(dataset)
+        for sub in sorted(layout.get_subjects()):
+            sessions = sorted(layout.get_sessions(subject=sub)) or [None]
+            rows.extend((dataset.name, sub, ses) for ses in sessions)
+
+    # build the columns with vectorized string operations
+    # rather than formatting each subject and session in the loop
+    entities = pd.DataFrame(rows, columns=["dataset", "sub", "ses"], dtype=object)
+    subject_id = "sub-" + entities["sub"]
+    session = "ses-" + entities["ses"]
+    session_dir = (session + "/").fillna("")
+    df = pd.DataFrame(
+        {
+            "DatasetID": entities["dataset"],
+            "SubjectID": subject_id,
+            "SessionID": session.fillna("n/a"),
+            "SessionPath": entities["dataset"] + "/" + subject_id + "/" + session_dir,
+        }
+    )
     output_file = output_dir.parent / "code" / "participants.tsv"
-    df.to_csv(output_file, sep="\t", index=False)
+    write_tsv(df, output_file)
     return output_file
 
 
+def read_tsv(tsv_file: Path | str, **kwargs: Any) -> pd.DataFrame:
+    """Read a TSV file with the multithreaded pyarrow parser if it is installed.
+
+    Falls back to the default pandas parser if pyarrow is not available
+    or cannot parse the file (for example when some rows have missing trailing fields).
+    A ``dtype`` can only be combined with other keyword arguments with the pandas parser.
+    """
+    if HAS_PYARROW and ("dtype" not in kwargs or kwargs.keys() == {"dtype"}):
+        try:
+            if "dtype" in kwargs:
+                return _read_tsv_with_dtype(tsv_file, kwargs["dtype"])
+            return pd.read_csv(tsv_file, sep="\t", engine="pyarrow", **kwargs)
+        except (ImportError, ValueError):
+            cc_log.debug(f"Could not read '{tsv_file}' with pyarrow.")
+    return pd.read_csv(tsv_file, sep="\t", **kwargs)
+
+
+def _read_tsv_with_dtype(tsv_file: Path | str, dtype: dict[str, str]) -> pd.DataFrame:
+    """Read a TSV file with pyarrow, parsing the columns in dtype as strings.
+
+    The pyarrow engine of pandas only casts columns after inferring their type,
+    so identifiers like ``001`` would lose their leading zeros.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    table = csv.read_csv(
+        tsv_file,
+        parse_options=csv.ParseOptions(delimiter="\t"),
+        convert_options=csv.ConvertOptions(
+            column_types={col: pa.string() for col in dtype}, strings_can_be_null=True
+        ),
+    )
+    return table.to_pandas().astype({col: dtype[col] for col in table.column_names if col in dtype})
+
+
+def read_json(json_file: Path | str) -> Any:
+    """Read a JSON file with the faster orjson parser if it is installed."""
+    if HAS_ORJSON:
+        import orjson
+
+        return orjson.loads(Path(json_file).read_bytes())
+    with open(json_file) as f:
+        return json.load(f)
+
+
+def write_tsv(df: pd.DataFrame, tsv_file: Path) -> None:
+    """Write a TSV file with the pyarrow writer if it is installed.
+
+    Meant for tables of strings: pyarrow does not format numbers like pandas does.
+    Falls back to the default pandas writer if pyarrow is not available
+    or cannot write the content as is (for example values containing tabs).
+    """
+    if HAS_PYARROW:
+        import pyarrow as pa
+        from pyarrow import csv
+
+        # header written separately as pyarrow always quotes column names
+        options = csv.WriteOptions(include_header=False, delimiter="\t", quoting_style="none")
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with open(tsv_file, "wb") as f:
+                f.write(("\t".join(df.columns) + "\n").encode())
+                csv.write_csv(table, f, write_options=options)
+            return
+        except pa.ArrowException:
+            cc_log.debug(f"Could not write '{tsv_file}' with pyarrow.")
+    df.to_csv(tsv_file, sep="\t", index=False)
+
+
+# identifiers of the dataset and participant listings are always read as strings
+# rather than having their type inferred,
+# listings exported from the neurobagel query tool pad the DatasetID header with spaces
+# (see inputs/dataset-results.tsv): it is only renamed after reading in check_tsv_content
+LISTING_DTYPES = {
+    "DatasetID": "string",
+    "      DatasetID": "string",
+    "SubjectID": "string",
+    "PortalURI": "string",
+}
+
+
 def check_tsv_for_empty_header(tsv_file: Path) -> pd.DataFrame:
-    """Check if tsv first line is empty and reload if so."""
-    dataset_listing_df = pd.read_csv(tsv_file, sep="\t")
-    if dataset_listing_df.columns[0] == "Unnamed: 0":
-        dataset_listing_df = pd.read_csv(tsv_file, sep="\t", index_col=0)
+    """Check if tsv first column has an empty header and use it as index if so."""
+    dataset_listing_df = read_tsv(tsv_file, dtype=LISTING_DTYPES)
+    # the name of an empty header depends on the parser used
+    if dataset_listing_df.columns[0] in ["Unnamed: 0", ""]:
+        dataset_listing_df = dataset_listing_df.set_index(dataset_listing_df.columns[0])
+        dataset_listing_df.index.name = None
     return dataset_listing_df
 
 
+def read_listing(listing_file: Path) -> pd.DataFrame:
+    """Read a dataset or participant listing.
+
+    Listings saved as parquet files are read directly,
+    which skips parsing text and inferring column types.
+    Requires pyarrow or fastparquet to be installed.
+
+    If pyarrow is installed, TSV listings are parsed once
+    and then loaded from a parquet file in the user cache as long as they are not modified.
+    Only the most recently used listings are kept in the cache.
+    """
+    if listing_file.suffix == ".parquet":
+        return pd.read_parquet(listing_file)
+
+    if not HAS_PYARROW:
+        return check_tsv_for_empty_header(listing_file)
+
+    # the same listings are usually passed to several successive commands (install, get, copy)
+    # so the parsed content of TSV listings is cached until they are modified
+    cache = _listing_cache(listing_file)
+    if cache.exists() and cache.stat().st_mtime >= listing_file.stat().st_mtime:
+        try:
+            df = pd.read_parquet(cache)
+            # mark the cached listing as recently used so it is not pruned
+            os.utime(cache)
+            return df
+        except Exception as exc:
+            cc_log.debug(f"Could not load cached listing from '{cache}': {exc}")
+
+    df = check_tsv_for_empty_header(listing_file)
+    try:
+        cache.parent.mkdir(exist_ok=True, parents=True)
+        df.to_parquet(cache)
+        _prune_listing_cache(cache.parent)
+    except (OSError, ValueError) as exc:
+        cc_log.debug(f"Could not cache listing '{listing_file}' to '{cache}': {exc}")
+    return df
+
+
+# maximum number of parsed listings kept in the user cache
+MAX_CACHED_LISTINGS = 16
+
+
+def _listing_cache(listing_file: Path) -> Path:
+    key = hashlib.sha1(str(listing_file.resolve()).encode()).hexdigest()
+    return _cache_dir() / "listings" / f"{key}_{__version__}.parquet"
+
+
+def _prune_listing_cache(cache_dir: Path) -> None:
+    """Remove cached listings of other versions and all but the most recently used ones."""
+    current = []
+    for cache in cache_dir.iterdir():
+        if cache.name.endswith(f"_{__version__}.parquet"):
+            current.append(cache)
+        else:
+            cache.unlink(missing_ok=True)
+    current.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+    for cache in current[MAX_CACHED_LISTINGS:]:
+        cache.unlink(missing_ok=True)
+
+
 def load_dataset_listing(dataset_listing: list[str]) -> pd.DataFrame:
-    """Load dataset listing from TSV file.
+    """Load dataset listing from TSV or parquet file.
 
     Parameters
     ----------
@@ -95,14 +258,15 @@ def load_dataset_listing(dataset_listing: list[str]) -> pd.DataFrame:
 
     elif len(dataset_listing) == 1:
         dataset = dataset_listing[0]
-        if not Path(dataset).exists():
+        dataset_tsv = Path(dataset)
+        if not dataset_tsv.exists():
             return pd.DataFrame({"DatasetID": [dataset]})
-        dataset_tsv = Path(dataset).resolve()
+        # resolved by check_tsv_content
         return check_tsv_content(dataset_tsv)
 
 
 def load_participant_listing(participant_listing: Path | str) -> pd.DataFrame:
-    """Load participant listing from TSV file."""
+    """Load participant listing from TSV or parquet file."""
     participant_listing_df = check_tsv_content(participant_listing)
     check_participant_listing(participant_listing_df)
     return participant_listing_df
@@ -115,9 +279,11 @@ def filter_excluded_participants(pth: Path, participants: list[str] | None) -> N
     participants_tsv = pth / "participants.tsv"
     if not (participants_tsv).exists():
         return
-    participants_df = pd.read_csv(participants_tsv, sep="\t")
-    participants_df = participants_df[participants_df["participant_id"].isin(participants)]
-    participants_df.to_csv(participants_tsv, sep="\t", index=False)
+    # values are only filtered and written back:
+    # reading them as is skips type inference and keeps them unchanged
+    participants_df = pd.read_csv(participants_tsv, sep="\t", dtype=str, keep_default_na=False)
+    participants_df = participants_df[participants_df["participant_id"].isin(set(participants))]
+    write_tsv(participants_df, participants_tsv)
 
 
 def copy_top_files(src_pth: Path, target_pth: Path, datatypes: list[str]) -> None:
@@ -128,22 +294,49 @@ def copy_top_files(src_pth: Path, target_pth: Path, datatypes: list[str]) -> Non
     if "anat" in datatypes:
         top_files.append("*T1w.json")
 
-    for top_file_ in top_files:
-        for f in src_pth.glob(top_file_):
-            if (target_pth / f.name).exists():
-                cc_log.debug(f"      file already present:\n       '{(target_pth / f.name)}'")
-                continue
-            try:
-                shutil.copy(src=f, dst=target_pth, follow_symlinks=True)
-            except FileNotFoundError:
-                cc_log.error(f"      Could not find file '{f}'")
+    # list the top folder once and match its content against all patterns
+    matcher = compile_glob_patterns(tuple(top_files))
+    for name in _list_dir(src_pth) or []:
+        if not matcher.match(name):
+            continue
+        f = src_pth / name
+        if (target_pth / name).exists():
+            cc_log.debug(f"      file already present:\n       '{(target_pth / name)}'")
+            continue
+        try:
+            # copy the content only: this uses sendfile where available
+            # and does not carry over the read-only mode of annexed files
+            # so participants.tsv can be filtered afterwards
+            shutil.copyfile(f, target_pth / name)
+        except FileNotFoundError:
+            cc_log.error(f"      Could not find file '{f}'")
+
+
+def link_or_copy(src: Path, dst: Path, link: bool = True) -> None:
+    """Hardlink src to dst and fall back to copying the file content.
+
+    Hardlinks are only possible within a single filesystem,
+    so the content is copied when the cohort is on another device than the source data.
+
+    Files of git (or datalad) datasets must be copied by passing ``link=False``:
+    editing a hardlink in the cohort would also edit the working tree of the source dataset.
+    Symlinks (like datalad annexed files) are always copied,
+    as a hardlink to an annex object would corrupt the annex of the source dataset.
+    """
+    if link and not Path(src).is_symlink():
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
 
 
 def check_tsv_content(tsv_file: Path | str) -> pd.DataFrame:
     tsv_file = Path(tsv_file).resolve()
     if not tsv_file.exists():
         raise FileNotFoundError(f"Could not find dataset listing at '{tsv_file}'")
-    df = check_tsv_for_empty_header(tsv_file)
+    df = read_listing(tsv_file)
     if "      DatasetID" in df.columns:
         cc_log.debug(f"Renaming column: '      DatasetID' -> 'DatasetID' in:\n{tsv_file}")
         df.rename(columns={"      DatasetID": "DatasetID"}, inplace=True)
@@ -165,39 +358,75 @@ def get_participant_ids(
     datasets: pd.DataFrame, participants: pd.DataFrame, dataset_name: str
 ) -> list[str] | None:
     datasets_id = return_dataset_id(datasets, dataset_name)
-    mask = participants["DatasetID"] == datasets_id
-    if mask.sum() == 0:
+    subjects = participants.loc[participants["DatasetID"] == datasets_id, "SubjectID"]
+    if subjects.empty:
         return None
-    participants_df = participants[mask]
-    return sorted(list(participants_df["SubjectID"].unique()))
+    # np.unique returns the subjects already sorted
+    return np.unique(subjects.to_numpy()).tolist()
+
+
+def index_dataset_ids(datasets: pd.DataFrame) -> dict[str, str]:
+    """Map the name of each dataset of a dataset listing to its dataset ID.
+
+    Done in a single pass over the listing,
+    so that the ID of a dataset can then be looked up in constant time.
+    """
+    names = datasets["PortalURI"].str.extract(return_dataset_uri_regex("(.+?)"), expand=False)
+    index: dict[str, str] = {}
+    for name, dataset_id in zip(names, datasets["DatasetID"]):
+        if pd.notna(name):
+            index.setdefault(str(name), str(dataset_id))
+    return index
 
 
 def return_dataset_id(datasets: pd.DataFrame, dataset_name: str) -> str:
     dataset_uri = return_dataset_uri_regex(dataset_name)
     mask = datasets.PortalURI.str.contains(dataset_uri, regex=True)
-    return datasets[mask]["DatasetID"].values[0]
+    return str(datasets.loc[mask, "DatasetID"].iat[0])
 
 
 def get_pipeline_version(pth: Path | None = None) -> None | str:
     """Try to get pipeline version from the dataset description."""
     if pth is None:
         return None
-    dataset_description = pth / "dataset_description.json"
-    if not dataset_description.exists():
+    if (generated_by := _generated_by(pth)) is None:
         return None
-    with open(dataset_description) as f:
-        data = json.load(f)
-    return data.get("GeneratedBy")[0].get("Version")
+    return generated_by.get("Version")
 
 
 def get_pipeline_name(pth: Path) -> None | str:
     """Try to get the name of the pipeline from the dataset description."""
+    if (generated_by := _generated_by(pth)) is None:
+        return None
+    return generated_by.get("Name")
+
+
+def _generated_by(pth: Path) -> dict[str, Any] | None:
+    """Return the first GeneratedBy entry of the dataset description if there is one."""
+    if (data := _dataset_description(pth)) is None:
+        return None
+    if not (generated_by := data.get("GeneratedBy")):
+        return None
+    return generated_by[0]
+
+
+def _dataset_description(pth: Path) -> dict[str, Any] | None:
+    """Return the content of the dataset_description.json of a dataset if there is one."""
     dataset_description = pth / "dataset_description.json"
-    if not dataset_description.exists():
+    try:
+        mtime = dataset_description.stat().st_mtime
+    except OSError:
         return None
-    with open(dataset_description) as f:
-        data = json.load(f)
-    return data.get("GeneratedBy")[0].get("Name")
+    return _read_dataset_description(dataset_description, mtime)
+
+
+@functools.lru_cache(maxsize=128)
+def _read_dataset_description(dataset_description: Path, mtime: float) -> dict[str, Any]:
+    """Read a dataset description only once as long as it is not modified.
+
+    The returned dictionary is shared by all callers and must not be modified.
+    """
+    return read_json(dataset_description)
 
 
 def is_subject_in_dataset(subject: str, dataset_pth: Path) -> bool:
@@ -221,6 +450,7 @@ def sourcedata(pth: Path) -> Path:
     return pth / "sourcedata"
 
 
+@functools.lru_cache(maxsize=None)
 def dataset_path(root: Path, dataset: str, derivative: str | None = None) -> Path:
     if derivative is None:
         return root / dataset
@@ -232,7 +462,28 @@ def get_sessions(
     participants: pd.DataFrame, dataset: str, participant: str
 ) -> list[str] | list[None]:
     mask = (participants["DatasetID"] == dataset) & (participants["SubjectID"] == participant)
-    sessions = sorted(participants[mask].SessionID.values.tolist())
+    return _clean_sessions(participants[mask].SessionID.values.tolist())
+
+
+def index_participant_listing(
+    participants: pd.DataFrame,
+) -> dict[str, dict[str, list[str] | list[None]]]:
+    """Map each dataset ID of a participant listing to its subjects and their sessions.
+
+    Done in a single pass over the listing,
+    so that subjects and sessions of a dataset can then be looked up in constant time.
+    """
+    index: dict[str, dict[str, list[str] | list[None]]] = {}
+    grouped = participants.groupby(["DatasetID", "SubjectID"])["SessionID"]
+    for (dataset_id, subject), sessions in grouped:
+        index.setdefault(str(dataset_id), {})[str(subject)] = _clean_sessions(
+            sessions.values.tolist()
+        )
+    return index
+
+
+def _clean_sessions(sessions: list[Any]) -> list[str] | list[None]:
+    sessions = sorted(sessions)
     for i, ses in enumerate(sessions):
         if isinstance(ses, float) and isnan(ses):
             sessions[i] = None
@@ -240,20 +491,36 @@ def get_sessions(
 
 
 def list_sessions_in_participant(participant_pth: Path) -> list[str] | list[None]:
-    if sessions := [
-        x.name for x in participant_pth.iterdir() if x.is_dir() and x.name.startswith("ses-")
-    ]:
-        return sorted(sessions)
+    if sessions := _list_subdirs(participant_pth, prefix="ses-"):
+        return sessions
     else:
         return [None]
 
 
+def _list_subdirs(pth: Path, prefix: str) -> list[str]:
+    """List the sorted names of the folders in pth that start with prefix.
+
+    Uses os.scandir as the type of each entry comes with the directory listing
+    and does not need an extra stat call like Path.is_dir.
+    """
+    with os.scandir(pth) as entries:
+        return sorted(
+            entry.name for entry in entries if entry.name.startswith(prefix) and entry.is_dir()
+        )
+
+
 def listify(some_str: str) -> list[str] | list[None]:
-    """Return a list from a string literal like `"['foo', 'bar']"`."""
-    if some_str == "[]":
-        return [None]
-    else:
-        return some_str.replace("[", "").replace("]", "").replace("'", "").split(", ")
+    """Return a list from a string literal like `"['foo', 'bar']"`.
+
+    Strings that are not a valid list literal, like `"[foo, bar]"`, are split on commas.
+    """
+    try:
+        value = literal_eval(some_str)
+    except (ValueError, SyntaxError):
+        value = None
+    if not isinstance(value, list):
+        value = some_str.replace("[", "").replace("]", "").replace("'", "").split(", ")
+    return [str(x) for x in value if x != ""] or [None]
 
 
 def validate_dataset_types(dataset_types: list[str]) -> None:
@@ -266,48 +533,18 @@ def validate_dataset_types(dataset_types: list[str]) -> None:
             )
 
 
-def add_study_tsv(output_dir: Path, datasets: list[str]) -> None:
+def add_study_tsv(output_dir: Path, datasets: list[str], max_workers: int | None = None) -> None:
     """Create a study.tsv file."""
     cc_log.info(" creating study.tsv file")
-    studies: dict[str, list[Any]] = {
-        "study_ID": [],
-        "mean_age": [],
-        "ratio_female": [],
-        "InstitutionName": [],
-        "InstitutionAddress": [],
-    }
-
-    for dataset_ in datasets:
-        studies["study_ID"].append(dataset_)
-
-        participants_tsv = dataset_path(output_dir, f"study-{dataset_}") / "participants.tsv"
-
-        if not participants_tsv.exists():
-            studies["mean_age"].append("n/a")
-            studies["ratio_female"].append("n/a")
-            studies["InstitutionName"].append("n/a")
-            studies["InstitutionAddress"].append("n/a")
-            continue
-
-        participants = pd.read_csv(participants_tsv, sep="\t")
-
-        if "age" in participants.columns:
-            mean_age = participants["age"].mean()
-            studies["mean_age"].append(mean_age)
-        else:
-            studies["mean_age"].append("n/a")
-
-        if "sex" in participants.columns:
-            ratio_female = participants["sex"].value_counts(normalize=True)["F"]
-            studies["ratio_female"].append(ratio_female)
-        else:
-            studies["ratio_female"].append("n/a")
-
-        institution_name, institution_address = get_institution(output_dir / f"study-{dataset_}")
-        studies["InstitutionName"].append(institution_name)
-        studies["InstitutionAddress"].append(institution_address)
-
-    df = pd.DataFrame.from_dict(studies)
+    # each study only reads its own files so they are summarized in parallel,
+    # this is the only level of parallelism: each study is summarized serially
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        studies = list(executor.map(functools.partial(_summarize_study, output_dir), datasets))
+
+    df = pd.DataFrame(
+        studies,
+        columns=["study_ID", "mean_age", "ratio_female", "InstitutionName", "InstitutionAddress"],
+    )
     df.to_csv(output_dir / "studies.tsv", sep="\t", index=False)
 
     studies_dict: dict[str, dict[str, str]] = {
@@ -329,22 +566,63 @@ def add_study_tsv(output_dir: Path, datasets: list[str]) -> None:
         json.dump(studies_dict, f, indent=4)
 
 
+# folders not indexed by pybids by default
+BIDS_IGNORED_DIRS = {"code", "derivatives", "models", "sourcedata", "stimuli"}
+
+
 def get_institution(dataset: Path) -> tuple[list[Any], list[Any]]:
-    layout = BIDSLayout(dataset)
-    files = layout.get(
-        suffix="bold|T[12]{1}w", extension="json", regex_search=True, return_type="filename"
-    )
+    # only file names are needed to find the sidecars
+    # so the dataset is walked directly rather than indexed with pybids
+    pattern = re.compile(r"_(bold|T[12]w)\.json$")
+    files: list[str] = []
+    for root, dirs, filenames in os.walk(dataset):
+        dirs[:] = [d for d in dirs if d not in BIDS_IGNORED_DIRS and not d.startswith(".")]
+        files.extend(os.path.join(root, f) for f in filenames if pattern.search(f))
+
+    institution_name: set[Any] = set()
+    institution_address: set[Any] = set()
+    for file in files:
+        data = read_json(file)
+        institution_name.add(data.get("InstitutionName"))
+        institution_address.add(data.get("InstitutionAddress"))
+
+    return (list(institution_name), list(institution_address))
 
-    institution_name = []
-    institution_address = []
-    for f in files:
-        with open(f) as json_file:
-            data = json.load(json_file)
-            institution_name.append(data.get("InstitutionName"))
-            institution_address.append(data.get("InstitutionAddress"))
-    institution_name = list(set(institution_name))
-    institution_address = list(set(institution_address))
-    return (institution_name, institution_address)
+
+def _summarize_study(output_dir: Path, dataset_: str) -> dict[str, Any]:
+    """Return the row of a study in studies.tsv."""
+    study: dict[str, Any] = {"study_ID": dataset_}
+
+    participants_tsv = dataset_path(output_dir, f"study-{dataset_}") / "participants.tsv"
+
+    if not participants_tsv.exists():
+        study["mean_age"] = "n/a"
+        study["ratio_female"] = "n/a"
+        study["InstitutionName"] = "n/a"
+        study["InstitutionAddress"] = "n/a"
+        return study
+
+    # only the columns needed for the summary are parsed
+    with open(participants_tsv) as f:
+        header = f.readline().rstrip("\r\n").split("\t")
+    columns = [col for col in ("age", "sex") if col in header]
+    participants = read_tsv(participants_tsv, usecols=columns) if columns else pd.DataFrame()
+
+    if "age" in participants.columns:
+        study["mean_age"] = participants["age"].mean()
+    else:
+        study["mean_age"] = "n/a"
+
+    if "sex" in participants.columns:
+        study["ratio_female"] = participants["sex"].dropna().eq("F").mean()
+    else:
+        study["ratio_female"] = "n/a"
+
+    institution_name, institution_address = get_institution(output_dir / f"study-{dataset_}")
+    study["InstitutionName"] = institution_name
+    study["InstitutionAddress"] = institution_address
+
+    return study
 
 
 def create_ds_description(output_dir: Path) -> None:
@@ -415,27 +693,32 @@ def set_version(derivative_path: Path) -> str:
 def get_anat_files(
     layout: BIDSLayout, sub: str, ses: str | None = None, extension: str = "json"
 ) -> list[BIDSFile]:
-    return get_files(layout=layout, sub=sub, suffix="^T[12]{1}w$", ses=ses, extension=extension)
+    return get_files(layout=layout, sub=sub, suffix=["T1w", "T2w"], ses=ses, extension=extension)
 
 
 def get_func_files(
     layout: BIDSLayout, sub: str, ses: str | None = None, extension: str = "json"
 ) -> list[BIDSFile]:
-    return get_files(layout=layout, sub=sub, suffix="^bold$", ses=ses, extension=extension)
+    return get_files(layout=layout, sub=sub, suffix="bold", ses=ses, extension=extension)
 
 
 def get_files(
-    layout: BIDSLayout, sub: str, suffix: str, ses: str | None = None, extension: str = "json"
+    layout: BIDSLayout,
+    sub: str,
+    suffix: str | list[str],
+    ses: str | None = None,
+    extension: str = "json",
 ) -> list[BIDSFile]:
-    if ses is None:
-        return layout.get(subject=sub, suffix=suffix, extension=extension, regex_search=True)
-    return layout.get(
-        subject=f"^{sub}$",
-        session=f"^{ses}$",
-        suffix=suffix,
-        extension=extension,
-        regex_search=True,
-    )
+    """Get the files of a subject with the given suffixes.
+
+    Entities are matched exactly so that pybids can use its index,
+    only the extension is a regular expression, matched case insensitively like pybids does.
+    """
+    entities: dict[str, str | list[str]] = {"subject": sub, "suffix": suffix}
+    if ses is not None:
+        entities["session"] = ses
+    pattern = re.compile(extension, re.IGNORECASE)
+    return [f for f in layout.get(**entities) if pattern.search(f.entities.get("extension", ""))]
 
 
 def default_bids_filter_file() -> Path:
@@ -449,8 +732,16 @@ def get_bids_filter(bids_filter_file: Path | None = None) -> dict[str, dict[str,
     if not bids_filter_file.exists():
         raise FileNotFoundError(f"Could not find bids filter file at '{bids_filter_file}'")
 
-    with open(bids_filter_file) as f:
-        filters = json.load(f)
+    # callers may modify the filters, so they get a copy of the cached content of the file
+    return copy.deepcopy(
+        _read_bids_filter(bids_filter_file.resolve(), bids_filter_file.stat().st_mtime)
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _read_bids_filter(bids_filter_file: Path, mtime: float) -> dict[str, dict[str, dict[str, str]]]:
+    """Read and validate a bids filter file only once as long as it is not modified."""
+    filters = read_json(bids_filter_file)
 
     validate_bids_filter(filters=filters, bids_filter_file=bids_filter_file)
 
@@ -461,17 +752,17 @@ def validate_bids_filter(
     filters: dict[str, dict[str, dict[str, str]]], bids_filter_file: Path
 ) -> None:
     REQUIRED_KEYS = {"datatype", "suffix", "ext"}
-    for dataset_type, required_key in itertools.product(filters, REQUIRED_KEYS):
-        if any(not isinstance(filters[dataset_type][x], dict) for x in filters[dataset_type]):
+    for dataset_type, suffix_groups in filters.items():
+        if any(not isinstance(x, dict) for x in suffix_groups.values()):
             raise TypeError(
                 f"All values in '{dataset_type}' "
                 f"in bids filter file at '{bids_filter_file}' "
                 "must be JSON objects."
             )
-        for suffix_group in filters[dataset_type]:
-            if required_key not in filters[dataset_type][suffix_group]:
+        for suffix_group, filter_ in suffix_groups.items():
+            if missing_keys := REQUIRED_KEYS - filter_.keys():
                 raise ValueError(
-                    f"Key '{required_key}' not found in '{dataset_type}[{suffix_group}]' "
+                    f"Key '{sorted(missing_keys)[0]}' not found in '{dataset_type}[{suffix_group}]' "
                     f"in bids filter file at '{bids_filter_file}'"
                 )
 
@@ -513,6 +804,16 @@ def create_glob_pattern_from_filter(dataset_type: str, filter: dict[str, str]) -
     return pattern
 
 
+@functools.lru_cache(maxsize=None)
+def compile_glob_patterns(glob_patterns: tuple[str, ...]) -> re.Pattern[str]:
+    """Compile glob patterns into a single case sensitive regular expression.
+
+    The same patterns are used for every subject of a dataset,
+    so each set of patterns is only compiled once.
+    """
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in glob_patterns))
+
+
 def list_all_files_with_filter(
     data_pth: Path,
     dataset_type: str,
@@ -522,9 +823,20 @@ def list_all_files_with_filter(
     datatype: str,
     task: str | None = None,
     space: str | None = None,
+    file_index: dict[Path, list[str]] | None = None,
 ) -> list[str]:
-    """List all data files of a datatype for all sessions of a subject in a dataset."""
+    """List all data files of a datatype for all sessions of a subject in a dataset.
+
+    If a ``file_index`` of the subject (see ``index_subject_files``) is passed,
+    files are looked up in it instead of listing the content of the datatype folders.
+    """
     files: list[str] = []
+    if not filters:
+        return files
+
+    dataset_root = str(data_pth)
+    if "derivatives" in dataset_root:
+        dataset_root = dataset_root.split("/derivatives")[0]
 
     for session_ in sessions:
         # TODO
@@ -533,14 +845,14 @@ def list_all_files_with_filter(
             datatype_pth = data_pth / subject / datatype
         else:
             datatype_pth = data_pth / subject / session_ / datatype
-        if not datatype_pth.exists():
+        names = _list_dir(datatype_pth, file_index)
+        if names is None:
             cc_log.warning(f"Path '{datatype_pth}' does not exist")
             continue
+        if not names:
+            continue
 
-        dataset_root = str(data_pth)
-        if "derivatives" in dataset_root:
-            dataset_root = dataset_root.split("/derivatives")[0]
-
+        glob_patterns = []
         for key in filters:
             filter_ = augment_filter(
                 dataset_type=dataset_type,
@@ -550,25 +862,44 @@ def list_all_files_with_filter(
                 task=task,
                 space=space,
             )
-            glob_pattern = create_glob_pattern_from_filter(
-                dataset_type=dataset_type, filter=filter_
-            )
-            files.extend(
-                [str(f.relative_to(dataset_root)) for f in datatype_pth.glob(glob_pattern)]
+            glob_patterns.append(
+                create_glob_pattern_from_filter(dataset_type=dataset_type, filter=filter_)
             )
             if filter_.get("ext") != "json":
                 tmp = filter_.copy()
                 tmp["ext"] = "json"
-                glob_pattern = create_glob_pattern_from_filter(
-                    dataset_type=dataset_type, filter=tmp
-                )
-                files.extend(
-                    [str(f.relative_to(dataset_root)) for f in datatype_pth.glob(glob_pattern)]
+                glob_patterns.append(
+                    create_glob_pattern_from_filter(dataset_type=dataset_type, filter=tmp)
                 )
 
+        matcher = compile_glob_patterns(tuple(glob_patterns))
+        # the relative path of the folder is computed once, not for each of its files
+        folder = str(datatype_pth.relative_to(dataset_root))
+        files.extend(f"{folder}{os.sep}{name}" for name in names if matcher.match(name))
+
     return sorted(files)
 
 
+def index_subject_files(data_pth: Path, subject: str) -> dict[Path, list[str]]:
+    """Walk the folder of a subject once and map each of its folders to the files it contains.
+
+    The index is not cached: it is built each time the files of a subject are listed,
+    so it cannot go stale between getting the data and copying it.
+    Symlinked folders are followed like pybids does.
+    """
+    return {Path(root): files for root, _, files in os.walk(data_pth / subject, followlinks=True)}
+
+
+def _list_dir(pth: Path, file_index: dict[Path, list[str]] | None = None) -> list[str] | None:
+    """List the content of a folder only once, or return None if it does not exist."""
+    if file_index is not None:
+        return file_index.get(pth)
+    if not pth.is_dir():
+        return None
+    with os.scandir(pth) as entries:
+        return [entry.name for entry in entries]
+
+
 def augment_filter(
     dataset_type: str,
     filters: dict[str, dict[str, str]],
@@ -577,7 +908,8 @@ def augment_filter(
     task: str | None = None,
     space: str | None = None,
 ) -> dict[str, str]:
-    filter_ = filters[key]
+    # copy so that the filters shared by all subjects and datasets are not modified
+    filter_ = dict(filters[key])
     filter_["ses"] = session or "*"
     if "task" not in filter_:
         filter_["task"] = "*"
@@ -599,18 +931,16 @@ def get_list_datasets_to_install(
     if participant_listing is None:
         return sorted(list(dataset_listing["DatasetID"]))
 
+    # index the listing once rather than scanning it for each dataset
+    portal_uris = dataset_listing.drop_duplicates("DatasetID").set_index("DatasetID")["PortalURI"]
+
     datasets_nodes = return_datasets_nodes(participant_listing)
-    list_datasets = []
-    for dataset in datasets_nodes:
-        dataset_uri = dataset_listing[dataset_listing["DatasetID"] == dataset]["PortalURI"].values[
-            0
-        ]
-        list_datasets.append(Path(dataset_uri).stem)
+    list_datasets = [Path(str(portal_uris.at[dataset])).stem for dataset in datasets_nodes]
     return sorted(list_datasets)
 
 
 def return_datasets_nodes(participant_listing: pd.DataFrame) -> list[str]:
-    return list(participant_listing["DatasetID"].unique())
+    return participant_listing["DatasetID"].unique().tolist()
 
 
 def return_dataset_uri_regex(dataset_name: str) -> str:
@@ -618,13 +948,11 @@ def return_dataset_uri_regex(dataset_name: str) -> str:
 
 
 def list_participants_in_dataset(data_pth: Path) -> list[str]:
-    return sorted([x.name for x in data_pth.iterdir() if x.is_dir() and x.name.startswith("sub-")])
+    return _list_subdirs(data_pth, prefix="sub-")
 
 
 def get_dataset_url(dataset_name: str, dataset_type: str) -> str:
-    datasets = known_datasets_df()
-    mask = datasets.name == dataset_name
-    url = datasets[mask][dataset_type].values[0]
+    url = known_datasets_index()[dataset_name][dataset_type]
     return "" if pd.isna(url) or not url else url
 
 
@@ -18,7 +18,7 @@ from datalad.support.exceptions import IncompleteResultsError
 from mne.io.brainvision.brainvision import _get_hdr_info
 from rich.progress import Progress
 
-from cohort_creator._utils import list_participants_in_dataset, progress_bar
+from cohort_creator._utils import list_participants_in_dataset, progress_bar, read_tsv
 from cohort_creator.data.utils import (
     KNOWN_DATATYPES,
     _data_dir,
@@ -194,7 +194,7 @@ def known_derivatives() -> list[str]:
         raise FileNotFoundError(
             f"{tsv} not found.\n" f"Run 'list_derivatives.py' script to create it."
         )
-    return pd.read_csv(tsv, sep="\t")["name"].values.tolist()
+    return read_tsv(tsv)["name"].values.tolist()
 
 
 def gh_api_base_url() -> str:
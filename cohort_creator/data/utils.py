@@ -3,13 +3,18 @@
 from __future__ import annotations
 
 import functools
+import importlib.util
+import json
+import os
+import tempfile
 from ast import literal_eval
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Hashable, Iterable
 
 import numpy as np
 import pandas as pd
 
+from cohort_creator._version import __version__
 from cohort_creator.logger import cc_logger
 
 cc_log = cc_logger()
@@ -50,6 +55,21 @@ def known_datasets_df() -> pd.DataFrame:
     return pd.concat([openneuro_df, non_opnenneuro_df])
 
 
+@functools.lru_cache(maxsize=1)
+def known_datasets_index() -> dict[Hashable, dict[Hashable, Any]]:
+    """Return the content of ``known_datasets_df`` as a dictionary indexed by dataset name.
+
+    Allows to look up a dataset without scanning the whole dataframe.
+    If a dataset is listed more than once, only its first listing is kept.
+
+    Returns
+    -------
+    dict[Hashable, dict[Hashable, Any]]
+        Maps each dataset name to a dictionary of its columns values.
+    """
+    return known_datasets_df().drop_duplicates("name").set_index("name").to_dict("index")
+
+
 def _data_dir() -> Path:
     return Path(__file__).parent
 
@@ -132,9 +152,7 @@ def is_known_dataset(dataset_name: str) -> bool:
     dataset_name : :obj:`str`
         Name of the dataset to check, for example ``ds000117``.
     """
-    openneuro = known_datasets_df()
-    mask = openneuro.name == dataset_name
-    return mask.sum() != 0
+    return dataset_name in known_datasets_index()
 
 
 def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -154,6 +172,8 @@ def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
     - ``nb_sessions``: :obj:`int` Total number of unique sessions in the dataset.
     - ``nb_authors``: :obj:`int` Number of authors as reported in the description of the dataset.
     - ``nb_tasks``: :obj:`int` Total number of unique tasks in the dataset.
+    - ``datatypes_str``: :obj:`str` Comma separated list of the datatypes of the dataset.
+    - ``tasks_str``: :obj:`str` Comma separated list of the tasks of the dataset.
     - ``useful_participants_tsv``: :obj:`bool`
     - ``has_physio``: :obj:`bool` ``True`` if the dataset contains any ``*_physio.tsv.gz`` files.
     - ``has_fmriprep``: :obj:`bool`` ``True`` if the dataset has knwow fmriprep preprocessed derivatives.
@@ -166,9 +186,9 @@ def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     _detect_duplicate_datasets(df)
 
-    df["nb_sessions"] = df["sessions"].apply(lambda x: max(len(x), 1))
+    df["nb_sessions"] = df["sessions"].str.len().clip(lower=1)
 
-    df["nb_datatypes"] = df["datatypes"].apply(lambda x: len(x))
+    df["nb_datatypes"] = df["datatypes"].str.len()
 
     # if only one column we assume it is only a participant_id file
     useful_participants_tsv = [(len(row[1]["participant_columns"]) > 1) for row in df.iterrows()]
@@ -183,7 +203,10 @@ def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
         df[der].fillna(False, inplace=True)
         df[f"has_{der}"] = df[der].apply(lambda x: bool(x))
 
-    df["nb_tasks"] = df["tasks"].apply(lambda x: len(x))
+    df["nb_tasks"] = df["tasks"].str.len()
+
+    for col in ["datatypes", "tasks"]:
+        df[f"{col}_str"] = df[col].str.join(", ").astype("string")
 
     df["source"] = _get_source_study(df)
 
@@ -204,7 +227,7 @@ def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
 
     _detect_missing_duration(df)
 
-    df["nb_authors"] = df["authors"].apply(lambda x: len(x))
+    df["nb_authors"] = df["authors"].str.len()
 
     df["has_physio"] = df["nb_physio_files"] > 0
 
@@ -246,6 +269,97 @@ def wrangle_data(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@functools.lru_cache(maxsize=1)
+def wrangled_known_datasets_df() -> pd.DataFrame:
+    """Return the wrangled dataframe of all datasets known to the cohort creator.
+
+    Wrangling is slow so, if pyarrow is installed,
+    its result is saved as a parquet file in the user cache
+    and reused as long as the listings of known datasets have not been modified.
+    Within a process, the dataframe is only loaded once.
+
+    Returns
+    -------
+    pd.DataFrame
+        Output of ``wrangle_data(known_datasets_df())``.
+    """
+    cache = _cache_dir() / f"known_datasets_{__version__}.parquet"
+    listings_mtime = max(
+        tsv.stat().st_mtime for tsv in [_openneuro_listing_tsv(), _non_openneuro_listing_tsv()]
+    )
+
+    if cache.exists() and cache.stat().st_mtime >= listings_mtime:
+        try:
+            return _read_parquet_cache(cache)
+        except Exception as exc:
+            cc_log.debug(f"Could not load cached known datasets from '{cache}': {exc}")
+
+    df = wrangle_data(known_datasets_df())
+    if importlib.util.find_spec("pyarrow") is None:
+        return df
+    try:
+        cache.parent.mkdir(exist_ok=True, parents=True)
+        _write_parquet_cache(df, cache)
+    except (OSError, ValueError) as exc:
+        cc_log.debug(f"Could not cache known datasets to '{cache}': {exc}")
+    return df
+
+
+# columns of lists, dicts or mixed types cannot be stored as is in a parquet file,
+# so they are cached as JSON strings under a prefixed name
+_JSON_COLUMN_PREFIX = "json:"
+
+
+def _write_parquet_cache(df: pd.DataFrame, cache: Path) -> None:
+    """Save a dataframe to a parquet file.
+
+    The file is written to a temporary file first and then moved in place,
+    so that processes reading or writing the same cache at once never see a partial file.
+    """
+    columns: dict[str, Any] = {}
+    for col in df.columns:
+        kind = pd.api.types.infer_dtype(df[col], skipna=False)
+        if df[col].dtype == object and kind not in ("string", "datetime"):
+            columns[f"{_JSON_COLUMN_PREFIX}{col}"] = [
+                json.dumps(x, default=_to_json) for x in df[col]
+            ]
+        else:
+            columns[col] = df[col]
+    encoded = pd.DataFrame(columns, index=df.index)
+
+    fd, tmp_file = tempfile.mkstemp(dir=cache.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        encoded.to_parquet(tmp_file)
+        os.replace(tmp_file, cache)
+    finally:
+        Path(tmp_file).unlink(missing_ok=True)
+
+
+def _read_parquet_cache(cache: Path) -> pd.DataFrame:
+    df = pd.read_parquet(cache)
+    columns: dict[str, Any] = {}
+    for col in df.columns:
+        if col.startswith(_JSON_COLUMN_PREFIX):
+            columns[col[len(_JSON_COLUMN_PREFIX) :]] = [json.loads(x) for x in df[col]]
+        else:
+            columns[col] = df[col]
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _to_json(x: Any) -> Any:
+    """Convert the numpy types that the json module cannot serialize."""
+    if isinstance(x, np.generic):
+        return x.item()
+    if isinstance(x, np.ndarray):
+        return x.tolist()
+    raise TypeError(f"Object of type {type(x).__name__} is not JSON serializable")
+
+
+def _cache_dir() -> Path:
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "cohort_creator"
+
+
 def _missing_duration(row: pd.Series) -> None | bool:
     if not set(row["datatypes"]).intersection(
         ("pet", "eeg", "ieeg", "meg", "motion", "nirs", "func")
@@ -325,12 +439,12 @@ DEFAULT_CONFIG: dict[str, bool | str | list[str] | None] = {
 }
 
 
-def filter_data(df: pd.Dataframe, config: Any = None) -> pd.DataFrame:
+def filter_data(df: pd.DataFrame, config: Any = None) -> pd.DataFrame:
     """Filter the listing of datasets based on some configuration.
 
     Parameters
     ----------
-    df : pd.Dataframe
+    df : pd.DataFrame
         Listing of datasets to filter.
     config : Any, default=None
         Should be a :obj:`dict` with any of the following keys.
@@ -357,7 +471,7 @@ def filter_data(df: pd.Dataframe, config: Any = None) -> pd.DataFrame:
 
     mask_sources = ALL_TRUE
     if config["sources"] is not None:
-        mask_sources = df["source"].apply(lambda x: len({x}.intersection(config["sources"])) > 0)
+        mask_sources = df["source"].isin(config["sources"])
         if config["sources_and_or"] == "AND":
             mask_sources = df["source"].apply(
                 lambda x: len({x}.intersection(config["sources"])) == len(config["sources"])
@@ -367,7 +481,9 @@ def filter_data(df: pd.Dataframe, config: Any = None) -> pd.DataFrame:
     # that the one of the requested datatypes has the task of interest
     mask_task = ALL_TRUE
     if config["task"] != "":
-        mask_task = df["tasks"].apply(lambda x: config["task"] in "".join(x).lower())
+        mask_task = (
+            df["tasks"].str.join("").str.lower().str.contains(config["task"], regex=False, na=False)
+        )
 
     mask_physio = ALL_TRUE
     if config["physio"] is not None:
@@ -447,7 +563,6 @@ def booleanify(value: bool | str | list[str] | None) -> bool | str | list[str] |
 
 
 def save_dataset_listing(df: pd.DataFrame) -> None:
-    df["DatasetID"] = df["name"].copy()
     df = df.rename(
         columns={
             "nb_subjects": "NumMatchingSubjects",
@@ -456,6 +571,7 @@ def save_dataset_listing(df: pd.DataFrame) -> None:
             "name": "DatasetName",
         }
     )
+    df["DatasetID"] = df["DatasetName"]
     output_df = df[
         [
             "DatasetID",
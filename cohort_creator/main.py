@@ -6,15 +6,15 @@ Then copy the data to a new directory structure to create a "cohort".
 
 from __future__ import annotations
 
+import functools
 import itertools
 import json
-import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import pandas as pd
 from datalad import api
-from datalad.support.exceptions import IncompleteResultsError
 
 from cohort_creator._utils import (
     add_study_tsv,
@@ -27,10 +27,12 @@ from cohort_creator._utils import (
     get_dataset_url,
     get_filters,
     get_list_datasets_to_install,
-    get_participant_ids,
     get_pipeline_version,
-    get_sessions,
+    index_dataset_ids,
+    index_participant_listing,
+    index_subject_files,
     is_subject_in_dataset,
+    link_or_copy,
     list_all_files_with_filter,
     list_participants_in_dataset,
     list_sessions_in_participant,
@@ -42,13 +44,19 @@ from cohort_creator._utils import (
     sourcedata,
 )
 from cohort_creator.bagelify import bagelify, new_bagel
-from cohort_creator.data.utils import is_known_dataset
+from cohort_creator.data.utils import is_known_dataset, known_datasets_index
 from cohort_creator.logger import cc_logger
 
 cc_log = cc_logger()
 
 
 def superdataset(pth: Path) -> api.Dataset:
+    return datalad_dataset(pth)
+
+
+@functools.lru_cache(maxsize=None)
+def datalad_dataset(pth: Path) -> api.Dataset:
+    """Instantiate the datalad dataset at a given path only once per process."""
     return api.Dataset(pth)
 
 
@@ -57,6 +65,7 @@ def install_datasets(
     output_dir: Path,
     dataset_types: list[str],
     generate_participant_listing: bool = False,
+    jobs: int = 6,
 ) -> None:
     """Will install several datalad datasets from openneuro.
 
@@ -76,27 +85,87 @@ def install_datasets(
     generate_participant_listing : bool, default=False
         If True, will generate a participant listing for all datasets.
 
+    jobs : int, default=6
+        Number of datasets (raw or derivatives) to install in parallel.
+
     """
-    with progress_bar(text="Installing datasets") as progress:
-        task = progress.add_task(description="install", total=len(datasets))
+    sourcedata_dir = sourcedata(output_dir)
 
-        for dataset_ in datasets:
-            cc_log.info(f" {dataset_}")
-            _install(dataset_name=dataset_, dataset_types=dataset_types, output_dir=output_dir)
-            progress.update(task, advance=1)
+    # list all the clones to install first
+    # so they can all be installed in parallel regardless of the dataset they belong to
+    registered = _registered_subdatasets(output_dir)
+    clones: dict[Path, str | None] = {}
+    for dataset_ in datasets:
+        cc_log.info(f" {dataset_}")
+        clones.update(_clones_to_install(dataset_, dataset_types, sourcedata_dir, registered))
+
+    # clones left unregistered by a previous run only need to be saved
+    installed = [data_pth for data_pth, uri in clones.items() if uri is None]
+    to_clone = {data_pth: uri for data_pth, uri in clones.items() if uri is not None}
+    errors: list[Exception] = []
+
+    with progress_bar(text="Installing datasets") as progress:
+        progress_task = progress.add_task(description="install", total=len(to_clone))
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    api.clone, source=uri, path=data_pth, result_renderer="disabled"
+                ): data_pth
+                for data_pth, uri in to_clone.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    cc_log.debug(f"  installed {futures[future]}")
+                    installed.append(futures[future])
+                except Exception as exc:
+                    cc_log.error(f"  could not install {futures[future]}: {exc}")
+                    errors.append(exc)
+                finally:
+                    progress.update(progress_task, advance=1)
+
+    # datasets are cloned in parallel but registered in the superdataset all at once
+    # to avoid concurrent writes to its git index.
+    # Successful clones are registered even if others failed
+    # so that they are not left out of the superdataset.
+    if installed:
+        superdataset(output_dir).save(
+            path=installed, message="install datasets", result_renderer="disabled"
+        )
+    if errors:
+        raise errors[0]
 
     if generate_participant_listing:
-        cc_log.info(f" Getting pybids layout of the following datasets: {dataset_}")
-        dataset_paths = [dataset_path(sourcedata(output_dir), dataset_) for dataset_ in datasets]
+        cc_log.info(f" Getting pybids layout of the following datasets: {datasets}")
+        dataset_paths = [dataset_path(sourcedata_dir, dataset_) for dataset_ in datasets]
         create_tsv_participant_session_in_datasets(
-            dataset_paths=dataset_paths, output_dir=sourcedata(output_dir)
+            dataset_paths=dataset_paths, output_dir=sourcedata_dir
         )
 
 
-def _install(dataset_name: str, dataset_types: list[str], output_dir: Path) -> None:
+def _registered_subdatasets(output_dir: Path) -> set[Path]:
+    """Return the resolved paths of the datasets registered in the superdataset of the cohort."""
+    subdatasets = superdataset(output_dir).subdatasets(
+        result_renderer="disabled", return_type="list"
+    )
+    return {Path(x["path"]).resolve() for x in subdatasets}
+
+
+def _clones_to_install(
+    dataset_name: str, dataset_types: list[str], sourcedata_dir: Path, registered: set[Path]
+) -> dict[Path, str | None]:
+    """Return the source URI of each clone needed for the requested dataset types of a dataset.
+
+    Clones already present but not registered in the superdataset
+    (for example when a previous install failed) are returned without URI
+    as they only need to be registered.
+    """
+    clones: dict[Path, str | None] = {}
+
     if not is_known_dataset(dataset_name):
         cc_log.warning(f"  {dataset_name} not found in list of known datasets")
-        return None
+        return clones
 
     for dataset_type_ in dataset_types:
         uri = get_dataset_url(dataset_name, dataset_type_)
@@ -112,19 +181,20 @@ def _install(dataset_name: str, dataset_types: list[str], output_dir: Path) -> N
             dataset_type_ = "raw"
 
         derivative = None if dataset_type_ == "raw" else dataset_type_
-        data_pth = dataset_path(sourcedata(output_dir), dataset_name, derivative=derivative)
+        data_pth = dataset_path(sourcedata_dir, dataset_name, derivative=derivative)
 
-        if data_pth.exists():
+        # derivatives in a subfolder of the raw dataset come with the raw clone
+        if data_pth.resolve() in registered or data_pth in clones:
             cc_log.debug(f"  {original_datatype} data already present at {data_pth}")
+        elif (data_pth / ".git").exists():
+            cc_log.info(f"    registering {original_datatype} data already cloned at: {data_pth}")
+            clones[data_pth] = None
         else:
             cc_log.info(f"    installing {original_datatype} data at: {data_pth}")
             if uri := get_dataset_url(dataset_name, dataset_type_):
-                api.install(
-                    path=data_pth,
-                    source=uri,
-                    dataset=api.Dataset(output_dir),
-                    result_renderer="disabled",
-                )
+                clones[data_pth] = uri
+
+    return clones
 
 
 def get_data(
@@ -137,6 +207,7 @@ def get_data(
     space: str,
     jobs: int,
     bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
+    dataset_jobs: int = 1,
 ) -> None:
     """Get the data for specified inputs from preinstalled datasets.
 
@@ -163,6 +234,9 @@ def get_data(
     jobs : int
         Number of jobs to use for parallelization during datalad get operation.
 
+    dataset_jobs : int, default=1
+        Number of datasets to get data from in parallel.
+
     """
     cc_log.info("Getting data")
 
@@ -172,88 +246,145 @@ def get_data(
     dataset_names = get_list_datasets_to_install(
         dataset_listing=datasets, participant_listing=participants
     )
+    participants_index = None if participants is None else index_participant_listing(participants)
+    dataset_ids = {} if participants is None else index_dataset_ids(datasets)
+    sourcedata_dir = sourcedata(output_dir)
 
-    with progress_bar(text="Getting data") as progress:
-        task = progress.add_task(description="get", total=len(dataset_names))
-
-        for dataset_ in dataset_names:
-            cc_log.info(f" {dataset_}")
+    # make sure the listing of known datasets is loaded before spawning threads
+    known_datasets_index()
 
-            participants_ids = return_participants_ids(
-                output_dir=output_dir,
-                datasets=datasets,
-                participants=participants,
-                dataset_name=dataset_,
-            )
-            if participants_ids is None:
-                continue
+    with progress_bar(text="Getting data") as progress:
+        progress_task = progress.add_task(description="get", total=len(dataset_names))
+
+        with ThreadPoolExecutor(max_workers=dataset_jobs) as executor:
+            futures = [
+                executor.submit(
+                    _get_data_this_dataset,
+                    dataset_name=dataset_,
+                    subjects_sessions=_subjects_sessions(dataset_ids, participants_index, dataset_),
+                    output_dir=output_dir,
+                    sourcedata_dir=sourcedata_dir,
+                    dataset_types=dataset_types,
+                    datatypes=datatypes,
+                    task=task,
+                    space=space,
+                    jobs=jobs,
+                    bids_filter=bids_filter,
+                )
+                for dataset_ in dataset_names
+            ]
+            for future in as_completed(futures):
+                future.result()
+                progress.update(progress_task, advance=1)
 
-            for dataset_type_ in dataset_types:
-                uri = get_dataset_url(dataset_, dataset_type_)
 
-                if not uri:
-                    cc_log.debug(f"      no {dataset_type_} for {dataset_}")
-                    continue
-                cc_log.info(f"  {dataset_type_}")
+def _get_data_this_dataset(
+    dataset_name: str,
+    subjects_sessions: dict[str, list[str] | list[None]] | None,
+    output_dir: Path,
+    sourcedata_dir: Path,
+    dataset_types: list[str],
+    datatypes: list[str],
+    task: str,
+    space: str,
+    jobs: int,
+    bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
+) -> None:
+    cc_log.info(f" {dataset_name}")
 
-                original_datatype = dataset_type_
+    participants_ids = return_participants_ids(
+        output_dir=output_dir,
+        dataset_name=dataset_name,
+        subjects_sessions=subjects_sessions,
+    )
+    if participants_ids is None:
+        return None
 
-                if dataset_type_ != "raw" and derivative_in_subfolder(dataset_, dataset_type_):
-                    dataset_type_ = "raw"
+    # derivatives stored in a subfolder of the raw dataset live in the same datalad dataset,
+    # so files are grouped per datalad dataset to get all of them at once
+    files_per_dataset: dict[Path, list[str]] = {}
+    for dataset_type_ in dataset_types:
+        uri = get_dataset_url(dataset_name, dataset_type_)
 
-                derivative = None if dataset_type_ == "raw" else dataset_type_
-                data_pth = dataset_path(sourcedata(output_dir), dataset_, derivative=derivative)
+        if not uri:
+            cc_log.debug(f"      no {dataset_type_} for {dataset_name}")
+            continue
+        cc_log.info(f"  {dataset_name} - {dataset_type_}")
 
-                dl_dataset = api.Dataset(data_pth)
+        original_datatype = dataset_type_
 
-                derivative_subfolder = ""
-                if dataset_type_ != original_datatype:
-                    derivative_subfolder = uri.split("tree/main/")[1]
-                data_pth = data_pth / derivative_subfolder
+        if dataset_type_ != "raw" and derivative_in_subfolder(dataset_name, dataset_type_):
+            dataset_type_ = "raw"
 
-                for subject in participants_ids:
-                    if not is_subject_in_dataset(subject, data_pth):
-                        cc_log.debug(f"  no participant {subject} in dataset {dataset_}")
-                        continue
+        derivative = None if dataset_type_ == "raw" else dataset_type_
+        dl_dataset_pth = dataset_path(sourcedata_dir, dataset_name, derivative=derivative)
+
+        derivative_subfolder = ""
+        if dataset_type_ != original_datatype:
+            derivative_subfolder = uri.split("tree/main/")[1]
+        data_pth = dl_dataset_pth / derivative_subfolder
+
+        files = _list_files_these_subjects(
+            dataset_name=dataset_name,
+            participants_ids=participants_ids,
+            subjects_sessions=subjects_sessions,
+            filters=_filters_per_datatype(original_datatype, datatypes, bids_filter),
+            task=task,
+            space=space,
+            dataset_type=original_datatype,
+            data_pth=data_pth,
+        )
+        files_per_dataset.setdefault(dl_dataset_pth, []).extend(files)
 
-                    if participants is not None:
-                        sessions = get_sessions(participants, dataset_, subject)
-                    else:
-                        sessions = list_sessions_in_participant(data_pth / subject)
+    for dl_dataset_pth, files in files_per_dataset.items():
+        if not files:
+            continue
+        files = list(dict.fromkeys(files))
+
+        # a single call per dataset lets git-annex parallelize across all files:
+        # an explicit number of jobs is passed to 'git annex get' as '-J',
+        # so 'datalad.runtime.max-annex-jobs' (only used when jobs="auto") needs not be set
+        cc_log.debug(f"   getting files:\n     {files}")
+        for result in datalad_dataset(dl_dataset_pth).get(
+            path=files,
+            jobs=jobs,
+            result_renderer="disabled",
+            return_type="generator",
+            on_failure="ignore",
+        ):
+            if result["status"] not in ["ok", "notneeded"]:
+                cc_log.error(
+                    f"   {dataset_name} - failed to get '{result.get('path')}': "
+                    f"{result.get('message')}"
+                )
 
-                    _get_data_this_subject(
-                        subject=subject,
-                        sessions=sessions,
-                        datatypes=datatypes,
-                        task=task,
-                        space=space,
-                        dataset_type=original_datatype,
-                        data_pth=data_pth,
-                        dl_dataset=dl_dataset,
-                        jobs=jobs,
-                        bids_filter=bids_filter,
-                    )
 
-            progress.update(task, advance=1)
+def _subjects_sessions(
+    dataset_ids: dict[str, str],
+    participants_index: dict[str, dict[str, list[str] | list[None]]] | None,
+    dataset_name: str,
+) -> dict[str, list[str] | list[None]] | None:
+    """Return the sessions of each subject of a dataset in the participant listing, if any."""
+    if participants_index is None:
+        return None
+    return participants_index.get(dataset_ids[dataset_name], {})
 
 
 def return_participants_ids(
     output_dir: Path,
-    datasets: pd.DataFrame,
-    participants: pd.DataFrame | None,
     dataset_name: str,
+    subjects_sessions: dict[str, list[str] | list[None]] | None,
     base_msg: str = "getting data for",
 ) -> list[str] | None:
     # if no participants_ids then we grab all the participants
     # from the raw dataset
-    if participants is not None:
-        participants_ids = get_participant_ids(
-            datasets=datasets, participants=participants, dataset_name=dataset_name
-        )
+    if subjects_sessions is not None:
+        participants_ids = sorted(subjects_sessions)
         if not participants_ids:
             cc_log.warning(f"  no participants in dataset {dataset_name}")
             return None
-        cc_log.info(f"  {base_msg}: {participants_ids}")
+        cc_log.info(f"  {base_msg} {len(participants_ids)} participants")
+        cc_log.debug(f"  {participants_ids}")
 
     else:
         data_pth = dataset_path(sourcedata(output_dir), dataset_name)
@@ -263,40 +394,96 @@ def return_participants_ids(
     return participants_ids
 
 
-def _get_data_this_subject(
-    subject: str,
-    sessions: list[str] | list[None],
+def _filters_per_datatype(
+    dataset_type: str,
     datatypes: list[str],
+    bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
+) -> dict[str, dict[str, dict[str, str]]]:
+    """Get the BIDS filters of each datatype once for all the subjects of a dataset.
+
+    Datatypes without any filter for this dataset type are dropped
+    as no file could be found for them.
+    """
+    filters = {}
+    for datatype_ in datatypes:
+        if filters_ := get_filters(
+            dataset_type=dataset_type, datatype=datatype_, bids_filter=bids_filter
+        ):
+            filters[datatype_] = filters_
+        else:
+            cc_log.debug(f"  no filter for {datatype_} data in {dataset_type}")
+    return filters
+
+
+def _list_files_these_subjects(
+    dataset_name: str,
+    participants_ids: list[str],
+    subjects_sessions: dict[str, list[str] | list[None]] | None,
+    filters: dict[str, dict[str, dict[str, str]]],
     task: str,
     space: str,
     dataset_type: str,
     data_pth: Path,
-    dl_dataset: api.Dataset,
-    jobs: int,
-    bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
-) -> None:
-    for datatype_ in datatypes:
-        filters = get_filters(
-            dataset_type=dataset_type, datatype=datatype_, bids_filter=bids_filter
+) -> list[str]:
+    """List the files to get for all requested datatypes of several subjects of a dataset."""
+    files: list[str] = []
+    if not filters:
+        return files
+    for subject in participants_ids:
+        if not is_subject_in_dataset(subject, data_pth):
+            cc_log.debug(f"  no participant {subject} in dataset {dataset_name}")
+            continue
+
+        if subjects_sessions is not None:
+            sessions = subjects_sessions[subject]
+        else:
+            sessions = list_sessions_in_participant(data_pth / subject)
+
+        files.extend(
+            _list_files_this_subject(
+                subject=subject,
+                sessions=sessions,
+                filters=filters,
+                task=task,
+                space=space,
+                dataset_type=dataset_type,
+                data_pth=data_pth,
+            )
         )
-        files = list_all_files_with_filter(
+    return files
+
+
+def _list_files_this_subject(
+    subject: str,
+    sessions: list[str] | list[None],
+    filters: dict[str, dict[str, dict[str, str]]],
+    task: str,
+    space: str,
+    dataset_type: str,
+    data_pth: Path,
+) -> list[str]:
+    """List the files to get or copy for all requested datatypes of a subject."""
+    files: list[str] = []
+    if not filters:
+        return files
+    file_index = index_subject_files(data_pth, subject)
+    for datatype_, filters_ in filters.items():
+        files_datatype = list_all_files_with_filter(
             data_pth=data_pth,
             dataset_type=dataset_type,
-            filters=filters,
+            filters=filters_,
             subject=subject,
             sessions=sessions,
             datatype=datatype_,
             task=task,
             space=space,
+            file_index=file_index,
         )
-        if not files:
-            cc_log.warning(no_files_found_msg(data_pth, subject, datatype_, filters))
+        if not files_datatype:
+            cc_log.warning(no_files_found_msg(data_pth, subject, datatype_, filters_))
             continue
-        cc_log.debug(f"    {subject} - getting files:\n     {files}")
-        try:
-            dl_dataset.get(path=files, jobs=jobs, result_renderer="disabled")
-        except IncompleteResultsError:
-            cc_log.error(f"    {subject} - failed to get files:\n     {files}")
+        files.extend(files_datatype)
+    return files
 
 
 def construct_cohort(
@@ -309,6 +496,7 @@ def construct_cohort(
     space: str,
     bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
     skip_group_mriqc: bool = False,
+    jobs: int = 6,
 ) -> None:
     """Copy the data from sourcedata_dir to output_dir, to create a cohort.
 
@@ -332,6 +520,10 @@ def construct_cohort(
     space : str
         Space of the data to get (only applies when dataset_types requested includes fmriprep).
 
+    jobs : int
+        Number of files to copy in parallel,
+        and of studies to summarize in parallel.
+
     """
     cc_log.info("Constructing cohort")
 
@@ -343,93 +535,109 @@ def construct_cohort(
     dataset_names = get_list_datasets_to_install(
         dataset_listing=datasets, participant_listing=participants
     )
+    participants_index = None if participants is None else index_participant_listing(participants)
+    dataset_ids = {} if participants is None else index_dataset_ids(datasets)
+    sourcedata_dir = sourcedata(output_dir)
+    # keep track of the folders already created in the cohort across all datasets
+    created_dirs: set[Path] = set()
 
-    for dataset_ in dataset_names:
-        cc_log.info(f" {dataset_}")
+    # a single pool copies the files of all subjects
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    with executor, progress_bar(text="Copying data") as progress:
+        progress_task = progress.add_task(description="copy", total=len(dataset_names))
 
-        participants_ids = return_participants_ids(
-            output_dir=output_dir,
-            datasets=datasets,
-            participants=participants,
-            dataset_name=dataset_,
-            base_msg="creating cohort with",
-        )
-        if participants_ids is None:
-            continue
+        for dataset_ in dataset_names:
+            cc_log.info(f" {dataset_}")
 
-        data_pth = dataset_path(sourcedata(output_dir), dataset_)
+            subjects_sessions = _subjects_sessions(dataset_ids, participants_index, dataset_)
+            participants_ids = return_participants_ids(
+                output_dir=output_dir,
+                dataset_name=dataset_,
+                subjects_sessions=subjects_sessions,
+                base_msg="creating cohort with",
+            )
+            if participants_ids is None:
+                progress.update(progress_task, advance=1)
+                continue
 
-        nipoppy_template(output_dir=output_dir, dataset=dataset_)
-        with open(nipoppy_config_path(output_dir=output_dir, dataset=dataset_)) as f:
-            nipoppy_config = json.load(f)
+            data_pth = dataset_path(sourcedata_dir, dataset_)
 
-        for dataset_type_ in dataset_types:
-            uri = get_dataset_url(dataset_, dataset_type_)
+            nipoppy_template(output_dir=output_dir, dataset=dataset_)
+            with open(nipoppy_config_path(output_dir=output_dir, dataset=dataset_)) as f:
+                nipoppy_config = json.load(f)
 
-            if not uri:
-                cc_log.debug(f"      no {dataset_type_} for {dataset_}")
-                continue
-            cc_log.info(f"  {dataset_type_}")
+            for dataset_type_ in dataset_types:
+                uri = get_dataset_url(dataset_, dataset_type_)
 
-            original_datatype = dataset_type_
+                if not uri:
+                    cc_log.debug(f"      no {dataset_type_} for {dataset_}")
+                    continue
+                cc_log.info(f"  {dataset_type_}")
 
-            if dataset_type_ != "raw" and derivative_in_subfolder(dataset_, dataset_type_):
-                dataset_type_ = "raw"
+                original_datatype = dataset_type_
 
-            derivative = None if dataset_type_ == "raw" else dataset_type_
-            src_pth = dataset_path(sourcedata(output_dir), dataset_, derivative=derivative)
+                if dataset_type_ != "raw" and derivative_in_subfolder(dataset_, dataset_type_):
+                    dataset_type_ = "raw"
 
-            if dataset_type_ != "raw":
-                version = get_pipeline_version(src_pth)
-                nipoppy_config["PROC_PIPELINES"][dataset_type_]["VERSION"] = version
+                derivative = None if dataset_type_ == "raw" else dataset_type_
+                src_pth = dataset_path(sourcedata_dir, dataset_, derivative=derivative)
 
-            derivative_subfolder = ""
-            if dataset_type_ != original_datatype:
-                derivative_subfolder = uri.split("tree/main/")[1]
-            src_pth = src_pth / derivative_subfolder
+                if dataset_type_ != "raw":
+                    version = get_pipeline_version(src_pth)
+                    nipoppy_config["PROC_PIPELINES"][dataset_type_]["VERSION"] = version
 
-            target_pth = return_target_pth(output_dir, dataset_type_, dataset_, src_pth)
-            target_pth.mkdir(exist_ok=True, parents=True)
+                derivative_subfolder = ""
+                if dataset_type_ != original_datatype:
+                    derivative_subfolder = uri.split("tree/main/")[1]
+                src_pth = src_pth / derivative_subfolder
 
-            copy_top_files(src_pth=src_pth, target_pth=target_pth, datatypes=datatypes)
-            filter_excluded_participants(pth=target_pth, participants=participants_ids)
+                target_pth = return_target_pth(output_dir, dataset_type_, dataset_, src_pth)
+                target_pth.mkdir(exist_ok=True, parents=True)
 
-            for subject in participants_ids:
-                if not is_subject_in_dataset(subject, src_pth):
-                    cc_log.debug(f"  no participant {subject} in dataset {dataset_}")
-                    continue
+                copy_top_files(src_pth=src_pth, target_pth=target_pth, datatypes=datatypes)
+                filter_excluded_participants(pth=target_pth, participants=participants_ids)
 
-                if participants is not None:
-                    sessions = get_sessions(participants, dataset_, subject)
-                else:
-                    sessions = list_sessions_in_participant(data_pth / subject)
+                filters = _filters_per_datatype(original_datatype, datatypes, bids_filter)
 
-                _copy_this_subject(
-                    subject=subject,
-                    sessions=sessions,
-                    datatypes=datatypes,
-                    dataset_type=original_datatype,
-                    task=task,
-                    space=space,
-                    src_pth=src_pth,
-                    target_pth=target_pth,
-                    bids_filter=bids_filter,
-                )
+                for subject in participants_ids:
+                    if not is_subject_in_dataset(subject, src_pth):
+                        cc_log.debug(f"  no participant {subject} in dataset {dataset_}")
+                        continue
 
-                _update_nipoppy_manifest(
-                    datatypes, subject, sessions, dataset_type_, output_dir, dataset_
-                )
+                    if subjects_sessions is not None:
+                        sessions = subjects_sessions[subject]
+                    else:
+                        sessions = list_sessions_in_participant(data_pth / subject)
 
-        # TODO update proc/invocations for boutiques
+                    _copy_this_subject(
+                        subject=subject,
+                        sessions=sessions,
+                        filters=filters,
+                        dataset_type=original_datatype,
+                        task=task,
+                        space=space,
+                        src_pth=src_pth,
+                        target_pth=target_pth,
+                        executor=executor,
+                        created_dirs=created_dirs,
+                    )
 
-        nipoppy_config = _update_nipoppy_config(
-            output_dir=output_dir, nipoppy_config=nipoppy_config, dataset=dataset_
-        )
+                    _update_nipoppy_manifest(
+                        datatypes, subject, sessions, dataset_type_, output_dir, dataset_
+                    )
 
-        with open(nipoppy_config_path(output_dir=output_dir, dataset=dataset_), "w") as f:
-            json.dump(nipoppy_config, f, indent=4)
+            # TODO update proc/invocations for boutiques
 
-    add_study_tsv(output_dir, dataset_names)
+            nipoppy_config = _update_nipoppy_config(
+                output_dir=output_dir, nipoppy_config=nipoppy_config, dataset=dataset_
+            )
+
+            with open(nipoppy_config_path(output_dir=output_dir, dataset=dataset_), "w") as f:
+                json.dump(nipoppy_config, f, indent=4)
+
+            progress.update(progress_task, advance=1)
+
+    add_study_tsv(output_dir, dataset_names, max_workers=jobs)
 
     _generate_bagel_for_cohort(
         output_dir=output_dir,
@@ -483,49 +691,59 @@ def _update_nipoppy_manifest(datatypes, subject, sessions, dataset_type_, output
 def _copy_this_subject(
     subject: str,
     sessions: list[str] | list[None],
-    datatypes: list[str],
+    filters: dict[str, dict[str, dict[str, str]]],
     dataset_type: str,
     task: str,
     space: str,
     src_pth: Path,
     target_pth: Path,
-    bids_filter: None | dict[str, dict[str, dict[str, str]]] = None,
+    executor: ThreadPoolExecutor,
+    created_dirs: set[Path] | None = None,
 ) -> None:
-    for datatype_ in datatypes:
-        filters = get_filters(
-            dataset_type=dataset_type, datatype=datatype_, bids_filter=bids_filter
-        )
-        files = list_all_files_with_filter(
-            data_pth=src_pth,
-            dataset_type=dataset_type,
-            filters=filters,
-            subject=subject,
-            sessions=sessions,
-            datatype=datatype_,
-            task=task,
-            space=space,
-        )
-        if not files:
-            cc_log.warning(no_files_found_msg(src_pth, subject, datatype_, filters))
-            continue
-
-        cc_log.debug(f"    {subject} - copying files:\n     {files}")
+    files = _list_files_this_subject(
+        subject=subject,
+        sessions=sessions,
+        filters=filters,
+        task=task,
+        space=space,
+        dataset_type=dataset_type,
+        data_pth=src_pth,
+    )
+    if not files:
+        return None
 
-        dataset_root = src_pth
-        if "derivatives" in str(dataset_root):
-            dataset_root = Path(str(dataset_root).split("/derivatives")[0])
+    cc_log.debug(f"    {subject} - copying files:\n     {files}")
+
+    dataset_root = src_pth
+    if "derivatives" in str(dataset_root):
+        dataset_root = Path(str(dataset_root).split("/derivatives")[0])
+    # files tracked by git must not be shared with the cohort
+    link = not (dataset_root / ".git").exists()
+
+    # folders are created before copying in parallel to avoid racing on mkdir
+    if created_dirs is None:
+        created_dirs = set()
+    files_to_copy = []
+    for f in files:
+        parent = (target_pth / f).parent
+        if parent not in created_dirs:
+            parent.mkdir(exist_ok=True, parents=True)
+            created_dirs.add(parent)
+        if (target_pth / f).exists():
+            cc_log.debug(f"      file already present:\n       '{f}'")
+            continue
+        files_to_copy.append(f)
 
-        for f in files:
-            sub_dirs = Path(f).parents
-            (target_pth / sub_dirs[0]).mkdir(exist_ok=True, parents=True)
-            if (target_pth / f).exists():
-                cc_log.debug(f"      file already present:\n       '{f}'")
-                continue
-            try:
-                shutil.copy(src=dataset_root / f, dst=target_pth / f, follow_symlinks=True)
-                # TODO deal with permission
-            except FileNotFoundError:
-                cc_log.error(f"      Could not find file '{f}' in {dataset_root}")
+    futures = {
+        executor.submit(link_or_copy, src=dataset_root / f, dst=target_pth / f, link=link): f
+        for f in files_to_copy
+    }
+    for future in as_completed(futures):
+        try:
+            future.result()
+            # TODO deal with permission
+        except FileNotFoundError:
+            cc_log.error(f"      Could not find file '{futures[future]}' in {dataset_root}")
 
 
 def _generate_bagel_for_cohort(
@@ -535,6 +753,7 @@ def _generate_bagel_for_cohort(
     cc_log.info(" creating bagel.csv file")
     bagel = new_bagel()
     supported_dataset_types = ["fmriprep", "mriqc"]
+    sourcedata_dir = sourcedata(output_dir)
     for dataset_type_, dataset_ in itertools.product(dataset_types, dataset_names):
         if dataset_type_ not in supported_dataset_types:
             continue
@@ -542,7 +761,7 @@ def _generate_bagel_for_cohort(
 
         raw_pth = return_target_pth(output_dir, dataset_type="raw", dataset=dataset_)
 
-        src_pth = dataset_path(sourcedata(output_dir), dataset_, derivative=dataset_type_)
+        src_pth = dataset_path(sourcedata_dir, dataset_, derivative=dataset_type_)
         derivative_pth = return_target_pth(output_dir, dataset_type_, dataset_, src_pth)
 
         bagel = bagelify(bagel, raw_pth, derivative_pth)
@@ -46,7 +46,7 @@ def main() -> None:
         print_results(datasets, file=f)
 
 
-def print_results(datasets: pd.Dataframe, file: TextIOWrapper) -> None:
+def print_results(datasets: pd.DataFrame, file: TextIOWrapper) -> None:
     print(
         f"Number of datasets: {len(datasets)} with {datasets.nb_subjects.sum()} subjects",
         file=file,
@@ -71,7 +71,7 @@ def print_results(datasets: pd.Dataframe, file: TextIOWrapper) -> None:
         )
 
 
-def has_mri(datasets: pd.Dataframe) -> pd.Dataframe:
+def has_mri(datasets: pd.DataFrame) -> pd.DataFrame:
     new_col = []
     for _, row in datasets.iterrows():
         value = {"anat", "func", "dwi", "fmap", "perf"}.intersection(set(row["datatypes"]))
@@ -14,6 +14,13 @@ def path_test_data():
     return Path(__file__).parent / "data"
 
 
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path, monkeypatch):
+    """Keep files cached during tests out of the cache of the user."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
 @pytest.fixture
 def bids_examples():
     return path_test_data() / "bids-examples"
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_creator._version import __version__
 from cohort_creator.data.utils import (
+    _read_parquet_cache,
+    _write_parquet_cache,
     filter_data,
     is_known_dataset,
     known_datasets_df,
     wrangle_data,
+    wrangled_known_datasets_df,
 )
 
 
@@ -29,3 +37,42 @@ def test_filter_data_no_datasets():
     fitlered_df = filter_data(df, config={"datatypes": ["foo"]})
 
     assert len(fitlered_df) == 0
+
+
+def test_wrangled_known_datasets_df_uses_cache(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    cache = tmp_path / "cohort_creator" / f"known_datasets_{__version__}.parquet"
+    cache.parent.mkdir(parents=True)
+    pd.DataFrame({"name": ["foo"]}).to_parquet(cache)
+
+    wrangled_known_datasets_df.cache_clear()
+    df = wrangled_known_datasets_df()
+    wrangled_known_datasets_df.cache_clear()
+
+    assert df["name"].tolist() == ["foo"]
+
+
+def test_parquet_cache_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame(
+        {
+            "name": ["ds000001", "ds000002"],
+            "datatypes": [["anat", "func"], []],
+            "duration": [{"func": {"rest": [np.float64(300.0)]}}, {"eeg": [np.nan]}],
+            "fmriprep": [False, "https://github.com/OpenNeuroDerivatives/ds000002-fmriprep"],
+            "nb_subjects": [16, 12],
+        }
+    )
+    cache = tmp_path / "cache.parquet"
+    _write_parquet_cache(df, cache)
+
+    cached = _read_parquet_cache(cache)
+
+    assert list(cached.columns) == list(df.columns)
+    assert cached["datatypes"].tolist() == [["anat", "func"], []]
+    assert cached["duration"][0] == {"func": {"rest": [300.0]}}
+    assert np.isnan(cached["duration"][1]["eeg"][0])
+    assert cached["fmriprep"].tolist() == df["fmriprep"].tolist()
+    assert cached["nb_subjects"].tolist() == [16, 12]
+    assert list(tmp_path.iterdir()) == [cache]
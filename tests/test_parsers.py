@@ -65,6 +65,22 @@ def test_parser_get():
             "raw",
             "--bids_filter_file",
             str(Path().cwd() / "foo.json"),
+            "--jobs",
+            "2",
         ]
     )
     print(args)
+    assert args.bids_filter_file == str(Path().cwd() / "foo.json")
+    assert args.jobs == 2
+
+
+def test_parser_only_subcommand():
+    parser = global_parser(only_subcommand="get")
+    args = parser.parse_args(["get", "-d", str(Path()), "-o", str(Path())])
+    assert args.command == "get"
+    assert args.jobs == 6
+
+
+def test_parser_is_cached():
+    assert global_parser() is global_parser()
+    assert global_parser(only_subcommand="get") is not global_parser()
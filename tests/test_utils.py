@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import json
+import os
+import time
 from pathlib import Path
 
 import numpy as np
@@ -14,9 +16,11 @@ from datalad import api
 from cohort_creator._utils import (
     check_participant_listing,
     check_tsv_content,
+    compile_glob_patterns,
     create_ds_description,
     create_tsv_participant_session_in_datasets,
     derivative_in_subfolder,
+    filter_excluded_participants,
     get_anat_files,
     get_bids_filter,
     get_dataset_url,
@@ -25,14 +29,21 @@ from cohort_creator._utils import (
     get_institution,
     get_list_datasets_to_install,
     get_participant_ids,
+    get_pipeline_name,
     get_pipeline_version,
     get_sessions,
+    index_dataset_ids,
+    index_participant_listing,
+    index_subject_files,
     is_subject_in_dataset,
+    link_or_copy,
     list_all_files_with_filter,
     list_participants_in_dataset,
+    listify,
     load_dataset_listing,
     load_participant_listing,
     nipoppy_template,
+    read_tsv,
     return_dataset_id,
     return_target_pth,
     set_name,
@@ -57,6 +68,47 @@ def test_return_dataset_id(PortalURI, extension):
     assert dataset_id == "ds000208"
 
 
+def test_index_dataset_ids():
+    datasets = pd.DataFrame(
+        {
+            "DatasetID": ["https://a/ds000001", "https://a/ds000002", "https://a/ds000003"],
+            "PortalURI": [
+                "https://github.com/OpenNeuroDatasets/ds000001.git",
+                "https://github.com/OpenNeuroDatasets-JSONLD/ds000002",
+                "https://example.com/ds000003",
+            ],
+        }
+    )
+    assert index_dataset_ids(datasets) == {
+        "ds000001": "https://a/ds000001",
+        "ds000002": "https://a/ds000002",
+    }
+
+
+@pytest.mark.parametrize(
+    "some_str, expected",
+    [
+        ("[]", [None]),
+        ("['ses-1']", ["ses-1"]),
+        ("['ses-1', 'ses-2']", ["ses-1", "ses-2"]),
+        ("[ses-1, ses-2]", ["ses-1", "ses-2"]),
+        ("'ses-1'", ["ses-1"]),
+        ("[1, 2]", ["1", "2"]),
+    ],
+)
+def test_listify(some_str, expected):
+    assert listify(some_str) == expected
+
+
+def test_filter_excluded_participants(tmp_path):
+    participants_tsv = tmp_path / "participants.tsv"
+    participants_tsv.write_text("participant_id\tage\nsub-01\t25\nsub-02\tn/a\nsub-03\tn/a\n")
+
+    filter_excluded_participants(pth=tmp_path, participants=["sub-02", "sub-03"])
+
+    assert participants_tsv.read_text() == "participant_id\tage\nsub-02\tn/a\nsub-03\tn/a\n"
+
+
 def test_create_tsv_participant_session_in_datasets(bids_examples, tmp_path):
     tsv_file = create_tsv_participant_session_in_datasets(
         dataset_paths=[bids_examples / "ds001", bids_examples / "ds006"], output_dir=tmp_path
@@ -98,6 +150,12 @@ def test_get_pipeline_version(bids_examples):
     assert get_pipeline_version(bids_examples / "ds000001-fmriprep") == "20.2.0rc0"
 
 
+def test_get_pipeline_version_no_generated_by(tmp_path):
+    (tmp_path / "dataset_description.json").write_text('{"Name": "foo"}')
+    assert get_pipeline_version(tmp_path) is None
+    assert get_pipeline_name(tmp_path) is None
+
+
 def test_set_version(bids_examples, tmp_path):
     assert set_version(bids_examples / "ds000001-fmriprep") == "20.2.0rc0"
     assert set_version(Path("foo")) == "UNKNOWN"
@@ -134,6 +192,32 @@ def test_check_tsv_content(tmp_path):
         check_tsv_content(tmp_path / "tmp.tsv")
 
 
+def test_check_tsv_content_empty_header(tmp_path):
+    (tmp_path / "tmp.tsv").write_text("\tDatasetID\n0\tds000001\n1\tds000002\n")
+    df = check_tsv_content(tmp_path / "tmp.tsv")
+    assert list(df.columns) == ["DatasetID"]
+    assert df["DatasetID"].tolist() == ["ds000001", "ds000002"]
+
+
+def test_check_tsv_content_padded_header(tmp_path):
+    (tmp_path / "tmp.tsv").write_text("      DatasetID\tPortalURI\n001\tfoo\n")
+    df = check_tsv_content(tmp_path / "tmp.tsv")
+    assert list(df.columns) == ["DatasetID", "PortalURI"]
+    assert df["DatasetID"].tolist() == ["001"]
+
+
+def test_read_tsv_dtype_with_other_arguments(tmp_path):
+    (tmp_path / "tmp.tsv").write_text("DatasetID\tSubjectID\tAge\n001\t01\t25\n")
+    df = read_tsv(tmp_path / "tmp.tsv", dtype={"DatasetID": "string"}, usecols=["DatasetID"])
+    assert df["DatasetID"].tolist() == ["001"]
+
+
+def test_read_tsv_missing_trailing_fields(tmp_path):
+    (tmp_path / "tmp.tsv").write_text("DatasetID\tSubjectID\tSessionID\nds000001\tsub-01\n")
+    df = read_tsv(tmp_path / "tmp.tsv")
+    assert df.shape == (1, 3)
+
+
 def test_check_participant_listing():
     df = pd.DataFrame({"foo": ["ds000001"]})
     with pytest.raises(ValueError, match="Column 'SubjectID' not found in"):
@@ -148,6 +232,34 @@ def test_get_sessions():
     assert get_sessions(participants, "ds001226", "sub-CON03") == ["ses-postop", "ses-preop"]
 
 
+def test_index_participant_listing():
+    input_file = root_dir() / "tests" / "data" / "participants.tsv"
+    participants = load_participant_listing(input_file)
+
+    index = index_participant_listing(participants)
+
+    assert index["ds000002"]["sub-13"] == [None]
+    assert index["ds001226"]["sub-CON03"] == ["ses-postop", "ses-preop"]
+    assert list(index["ds000001"]) == sorted(index["ds000001"])
+
+
+def test_index_subject_files(tmp_path):
+    (tmp_path / "sub-01" / "ses-01" / "anat").mkdir(parents=True)
+    (tmp_path / "sub-01" / "ses-01" / "anat" / "sub-01_ses-01_T1w.nii.gz").touch()
+    index = index_subject_files(tmp_path, "sub-01")
+    assert index[tmp_path / "sub-01" / "ses-01" / "anat"] == ["sub-01_ses-01_T1w.nii.gz"]
+    assert index[tmp_path / "sub-01"] == []
+
+
+def test_index_subject_files_follows_symlinks(tmp_path):
+    (tmp_path / "anat").mkdir()
+    (tmp_path / "anat" / "sub-01_T1w.nii.gz").touch()
+    (tmp_path / "sub-01").mkdir()
+    (tmp_path / "sub-01" / "anat").symlink_to(tmp_path / "anat")
+    index = index_subject_files(tmp_path, "sub-01")
+    assert index[tmp_path / "sub-01" / "anat"] == ["sub-01_T1w.nii.gz"]
+
+
 def test_validate_dataset_types():
     with pytest.raises(ValueError, match="Dataset type 'foo' is not supported."):
         validate_dataset_types(["foo"])
@@ -168,6 +280,34 @@ def test_create_ds_description(tmp_path):
     assert (tmp_path / "dataset_description.json").exists()
 
 
+def test_link_or_copy(tmp_path):
+    src = tmp_path / "src.txt"
+    src.write_text("foo")
+    (tmp_path / "link.txt").symlink_to(src)
+    dst = tmp_path / "dst.txt"
+    link_or_copy(src=tmp_path / "link.txt", dst=dst)
+    assert not dst.is_symlink()
+    assert not dst.samefile(src)
+    assert dst.read_text() == "foo"
+
+
+def test_link_or_copy_hardlinks_regular_files(tmp_path):
+    src = tmp_path / "src.txt"
+    src.write_text("foo")
+    dst = tmp_path / "dst.txt"
+    link_or_copy(src=src, dst=dst)
+    assert dst.samefile(src)
+
+
+def test_link_or_copy_no_link(tmp_path):
+    src = tmp_path / "src.txt"
+    src.write_text("foo")
+    dst = tmp_path / "dst.txt"
+    link_or_copy(src=src, dst=dst, link=False)
+    dst.write_text("bar")
+    assert src.read_text() == "foo"
+
+
 @pytest.mark.parametrize(
     "dataset_type, dataset, src_pth, expected",
     [
@@ -229,6 +369,12 @@ def test_get_bids_filter(tmp_path):
     assert bids_filter == content
 
 
+def test_get_bids_filter_returns_copy():
+    bids_filter = get_bids_filter()
+    bids_filter["raw"].clear()
+    assert get_bids_filter()["raw"] != {}
+
+
 def test_get_bids_filter_errors(tmp_path):
     with pytest.raises(FileNotFoundError):
         get_bids_filter(Path().cwd() / "foo")
@@ -256,6 +402,14 @@ def test_get_filters():
     assert sorted(filters.keys()) == ["bold", "events"]
 
 
+def test_compile_glob_patterns():
+    matcher = compile_glob_patterns(("*_T1w.nii*", "*_T1w.json"))
+    assert matcher.match("sub-01_T1w.nii.gz")
+    assert matcher.match("sub-01_T1w.json")
+    assert not matcher.match("sub-01_T1w.tsv")
+    assert not matcher.match("sub-01_t1w.nii.gz")
+
+
 def test_list_all_files_with_filter_raw(bids_examples):
     dataset_type = "raw"
     datatype = "anat"
@@ -383,6 +537,53 @@ def test_load_dataset_listing():
     load_dataset_listing(["ds000001", "ds000002"])
 
 
+def test_load_listings_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    for listing, loader in [
+        ("dataset-results", lambda x: load_dataset_listing([str(x)])),
+        ("participant-results", load_participant_listing),
+    ]:
+        expected = loader(root_dir() / "inputs" / f"{listing}.tsv")
+        parquet_file = tmp_path / f"{listing}.parquet"
+        expected.to_parquet(parquet_file)
+        pd.testing.assert_frame_equal(loader(parquet_file), expected)
+
+
+def test_load_participant_listing_uses_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    participants_listing_file = tmp_path / "participant-results.tsv"
+    participants_listing_file.write_text(
+        (root_dir() / "inputs" / "participant-results.tsv").read_text()
+    )
+
+    expected = load_participant_listing(participants_listing_file)
+    assert len(list((tmp_path / "cache").glob("cohort_creator/listings/*.parquet"))) == 1
+    pd.testing.assert_frame_equal(load_participant_listing(participants_listing_file), expected)
+
+    # modifying the listing invalidates the cache
+    participants_listing_file.write_text(
+        "\n".join(participants_listing_file.read_text().splitlines()[:2])
+    )
+    os.utime(participants_listing_file, (time.time() + 10, time.time() + 10))
+    assert len(load_participant_listing(participants_listing_file)) == 1
+
+
+def test_listing_cache_is_pruned(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("cohort_creator._utils.MAX_CACHED_LISTINGS", 2)
+    cache_dir = tmp_path / "cache" / "cohort_creator" / "listings"
+    cache_dir.mkdir(parents=True)
+    (cache_dir / "foo_0.0.1.pkl").write_text("")
+
+    for i in range(3):
+        listing = tmp_path / f"listing-{i}.tsv"
+        listing.write_text(f"DatasetID\tPortalURI\nds00000{i}\tfoo\n")
+        load_dataset_listing([str(listing)])
+
+    assert len(list(cache_dir.iterdir())) == 2
+    assert not (cache_dir / "foo_0.0.1.pkl").exists()
+
+
 def test_get_list_datasets_to_install():
     participants_listing_file = root_dir() / "inputs" / "participant-results.tsv"
     participant_listing = load_participant_listing(participants_listing_file)